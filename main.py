@@ -5,7 +5,6 @@ from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional, List
 import json
-import requests
 import os
 import sys
 import uuid
@@ -37,6 +36,7 @@ from src.utils import (
     get_speaker_statistics,
     renumber_speakers,
     ensure_upload_dirs,
+    atomic_write_bytes,
 )
 # Worker in-process will be importado en startup para evitar fallos de importación
 worker_module = None
@@ -51,26 +51,6 @@ app = FastAPI(
 )
 
 
-def _worker_file_head():
-    """Comprueba si /app/src/worker.py existe y devuelve las primeras líneas o None.
-
-    Esto se separa para evitar problemas de scope con Path dentro de la función de startup.
-    """
-    try:
-        p_check = Path(__file__).resolve().parent / 'src' / 'worker.py'
-        if p_check.exists():
-            try:
-                with open(p_check, 'r', encoding='utf-8') as fh:
-                    first_lines = ''.join([next(fh) for _ in range(5)])
-                return (p_check, first_lines)
-            except Exception:
-                return (p_check, None)
-        else:
-            return (p_check, None)
-    except Exception:
-        return (None, None)
-
-
 @app.on_event('startup')
 def start_worker_thread():
     """Lanza el worker en un hilo daemon para procesar jobs en `uploads/jobs/`.
@@ -86,70 +66,16 @@ def start_worker_thread():
         logger.info('DISABLE_EMBEDDED_WORKER set -> no se iniciará el worker embebido')
         return
 
-    # Importar el módulo del worker aquí y registrar cualquier excepción de import
+    # Importar el módulo del worker aquí y registrar cualquier excepción de import.
+    # Solo existe una copia del worker (src/worker.py): no se carga por ruta ni se
+    # descarga otra versión, que podría divergir de la del repositorio.
     if worker_module is None:
-        # Diagnostic: verificar si el archivo src/worker.py existe dentro del contenedor
-        p_check, first_lines = _worker_file_head()
-        if p_check is None:
-            logger.info("DEBUG: no se pudo determinar la ruta de worker.py")
-        else:
-            try:
-                if p_check.exists():
-                    logger.info(f"DEBUG: worker.py existe en la imagen en: {p_check} (size={p_check.stat().st_size} bytes)")
-                    if first_lines:
-                        logger.info(f"DEBUG: primeras líneas de worker.py:\n{first_lines}")
-                    else:
-                        logger.info("DEBUG: no se pudieron leer las primeras líneas de worker.py")
-                else:
-                    logger.info("DEBUG: worker.py NO existe en la imagen /app/src/")
-            except Exception:
-                logger.exception("DEBUG: error comprobando existencia de worker.py")
         try:
             import importlib
             worker_module = importlib.import_module('src.worker')
         except Exception as e:
             logger.exception(f"No se pudo importar module worker en startup: {e}")
-            # Fallback: intentar cargar por path (útil cuando el paquete no está en sys.path)
-            try:
-                import importlib.util
-                p = Path(__file__).resolve().parent / 'src' / 'worker.py'
-                if p.exists():
-                    spec = importlib.util.spec_from_file_location('embedded_worker', str(p))
-                    wm = importlib.util.module_from_spec(spec)
-                    spec.loader.exec_module(wm)
-                    worker_module = wm
-                    logger.info(f"Worker cargado desde archivo: {p}")
-                else:
-                    worker_module = None
-            except Exception as e2:
-                logger.exception(f"Fallback para cargar worker desde archivo falló: {e2}")
-                worker_module = None
-
-            # Si no había worker en la imagen, intentar descargarlo desde GitHub (raw) y cargarlo dinámicamente.
-            if worker_module is None:
-                try:
-                    raw_url = "https://raw.githubusercontent.com/Leocix/Transcripci-n-de-Audio/master/src/worker.py"
-                    logger.info(f"Intentando descargar worker desde: {raw_url}")
-                    # Usar requests con timeout corto
-                    resp = requests.get(raw_url, timeout=10)
-                    if resp.status_code == 200 and resp.text:
-                        # Escribir en un archivo temporal dentro del proyecto (no commit)
-                        tmp_path = Path(__file__).resolve().parent / 'src' / '_downloaded_worker.py'
-                        try:
-                            tmp_path.parent.mkdir(parents=True, exist_ok=True)
-                            tmp_path.write_text(resp.text, encoding='utf-8')
-                            spec = importlib.util.spec_from_file_location('downloaded_worker', str(tmp_path))
-                            wm2 = importlib.util.module_from_spec(spec)
-                            spec.loader.exec_module(wm2)
-                            worker_module = wm2
-                            logger.info(f"Worker dinámico cargado desde {raw_url} y guardado en {tmp_path}")
-                        except Exception as e3:
-                            logger.exception(f"Error al escribir/cargar worker descargado: {e3}")
-                            worker_module = None
-                    else:
-                        logger.warning(f"No se pudo descargar worker desde raw URL, status_code={resp.status_code}")
-                except Exception as e4:
-                    logger.exception(f"Excepción al intentar descargar worker desde GitHub: {e4}")
+            worker_module = None
 
     if worker_module is None:
         logger.info("Worker module no disponible; no se iniciará el worker embebido.")
@@ -180,6 +106,8 @@ app.add_middleware(
 WEB_DIR = PROJECT_ROOT / "web"
 UPLOAD_DIR = os.getenv("UPLOAD_DIR", str(PROJECT_ROOT / "uploads"))
 WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
+WHISPER_BACKEND = os.getenv("WHISPER_BACKEND", "auto")  # auto | faster_whisper | whisper | whisper_trt
+WHISPER_PRECISION = os.getenv("WHISPER_PRECISION", "auto")  # auto | fp32 | fp16 | int8 | int8_float16
 HF_TOKEN = os.getenv("HF_TOKEN")
 MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", 100 * 1024 * 1024))
 
@@ -339,7 +267,11 @@ def get_transcriber():
     if transcriber is None:
         logger.info(f"Cargando modelo Whisper: {WHISPER_MODEL}")
         try:
-            transcriber = AudioTranscriber(model_name=WHISPER_MODEL)
+            transcriber = AudioTranscriber(
+                model_name=WHISPER_MODEL,
+                backend=WHISPER_BACKEND,
+                precision=WHISPER_PRECISION
+            )
         except ModuleNotFoundError as e:
             # Rethrow with a clearer message for handlers
             logger.error(f"Dependencia faltante al inicializar transcriber: {e}")
@@ -466,6 +398,8 @@ async def debug_info():
         "status": "ok",
         "python_version": sys.version,
         "whisper_model": WHISPER_MODEL,
+        "whisper_backend": WHISPER_BACKEND,
+        "whisper_precision": WHISPER_PRECISION,
         "hf_token_configured": bool(HF_TOKEN),
         "hf_token_length": len(HF_TOKEN) if HF_TOKEN else 0,
         "upload_dir": UPLOAD_DIR,
@@ -571,14 +505,18 @@ async def create_job_from_url(payload: JobCreate):
 
     job_file = os.path.join(JOBS_DIR, f"{job_id}.json")
     try:
-        with open(job_file, 'w', encoding='utf-8') as f:
-            json.dump(meta, f)
+        # Escritura atómica: el worker nunca debe leer un job a medio escribir
+        atomic_write_bytes(job_file, json.dumps(meta).encode('utf-8'))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"No se pudo encolar el job: {e}")
 
     _create_job(job_id, meta=meta)
     _update_job(job_id, state='queued', message='en cola', progress=0)
 
+    # Despertar al worker embebido para que no espere al siguiente escaneo
+    if worker_module is not None and hasattr(worker_module, 'notify_new_job'):
+        worker_module.notify_new_job()
+
     return { 'job_id': job_id, 'status': 'queued' }
 
 
@@ -2,9 +2,16 @@
 Módulo de diarización de hablantes usando pyannote.audio
 """
 import os
-from typing import List, Dict, Optional
+import inspect
+from typing import TYPE_CHECKING, List, Dict, Optional, Union
 import logging
 
+if TYPE_CHECKING:
+    import numpy as np
+
+# Cargar los módulos CUDA bajo demanda (debe fijarse antes de importar torch)
+os.environ.setdefault("CUDA_MODULE_LOADING", "LAZY")
+
 # Import heavy libs lazily inside the class to avoid import-time overhead
 try:
     import torch
@@ -14,6 +21,29 @@ except Exception:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# El calentamiento de CUDA se hace una sola vez por proceso
+_WARMED = False
+
+# pyannote trabaja a 16 kHz mono: cargar el audio así evita duplicar memoria
+SAMPLE_RATE = 16000
+
+# Opcional: audios más largos que esto se diarizan por ventanas para acotar la
+# memoria (0 = desactivado, el audio se diariza entero de una vez)
+CHUNK_SECONDS = int(os.getenv("DIARIZATION_CHUNK_SECONDS", "0")) or None
+
+# Distancia coseno máxima para considerar que dos ventanas tienen el mismo hablante.
+# Por defecto, el umbral de clustering de pyannote/speaker-diarization-3.1 (≈0.7045)
+SPEAKER_LINK_THRESHOLD = float(os.getenv("DIARIZATION_LINK_THRESHOLD", "0.7045"))
+
+
+def _torch():
+    """Devuelve el módulo torch, importándolo y cacheándolo la primera vez."""
+    global torch
+    if torch is None:
+        import torch as _t
+        torch = _t
+    return torch
+
 
 class SpeakerDiarizer:
     """
@@ -29,9 +59,6 @@ class SpeakerDiarizer:
             hf_token: Token de Hugging Face para acceder al modelo
                      Obtener en: https://huggingface.co/settings/tokens
         """
-        # Referirse a la variable `torch` definida a nivel de módulo
-        global torch
-
         self.hf_token = hf_token or os.getenv("HF_TOKEN")
         
         if not self.hf_token:
@@ -41,15 +68,9 @@ class SpeakerDiarizer:
                 "Obtén uno en: https://huggingface.co/settings/tokens"
             )
         
-        # Determinar dispositivo si torch está disponible
-        if torch is None:
-            try:
-                import importlib
-                torch = importlib.import_module('torch')
-            except Exception:
-                torch = None
-
-        self.device = "cuda" if (torch is not None and torch.cuda.is_available()) else "cpu"
+        # Determinar dispositivo (torch es obligatorio para pyannote)
+        t = _torch()
+        self.device = "cuda" if t.cuda.is_available() else "cpu"
         logger.info(f"Inicializando diarizador en dispositivo '{self.device}'")
 
         # Desactivar symlinks en Windows
@@ -76,7 +97,8 @@ class SpeakerDiarizer:
 
             # Mover a GPU si está disponible
             if self.device == "cuda":
-                self.pipeline = self.pipeline.to(torch.device("cuda"))
+                self.pipeline = self.pipeline.to(t.device("cuda"))
+                self._warmup()
 
             logger.info("Pipeline de diarización cargado exitosamente")
 
@@ -102,29 +124,81 @@ class SpeakerDiarizer:
                 )
             raise
     
+    def _warmup(self):
+        """
+        Paga una sola vez por proceso el coste de la primera llamada a CUDA
+        (contexto, handles de cuDNN, autotune) con una pasada sobre 1 s de silencio.
+        """
+        global _WARMED
+        if _WARMED:
+            return
+
+        torch.backends.cudnn.benchmark = True
+        torch.set_float32_matmul_precision("high")
+
+        try:
+            logger.info("Calentando pipeline de diarización en GPU...")
+            dummy = torch.zeros(1, 16000, dtype=torch.float32, device=self.device)
+            with torch.inference_mode():
+                self.pipeline({"waveform": dummy, "sample_rate": 16000})
+            _WARMED = True
+        except Exception as e:
+            # El calentamiento es una optimización: si falla, la primera llamada real paga el coste
+            logger.warning(f"No se pudo calentar el pipeline de diarización: {e}")
+
     def diarize(
         self, 
-        audio_path: str,
+        audio_path: Union[str, "np.ndarray"],
         num_speakers: Optional[int] = None,
         min_speakers: Optional[int] = None,
-        max_speakers: Optional[int] = None
+        max_speakers: Optional[int] = None,
+        chunk_duration: Optional[int] = CHUNK_SECONDS
     ) -> List[Dict]:
         """
         Realiza diarización del audio.
         
         Args:
-            audio_path: Ruta al archivo de audio
+            audio_path: Ruta al archivo de audio, o el audio ya decodificado
+                        (array float32 mono a 16 kHz, p. ej. el mismo que se
+                        pasó a Whisper, para no decodificarlo dos veces)
             num_speakers: Número exacto de hablantes (opcional)
             min_speakers: Número mínimo de hablantes (opcional)
             max_speakers: Número máximo de hablantes (opcional)
+            chunk_duration: Duración en segundos de cada ventana para audios
+                           largos (None o 0 = procesar el audio completo)
         
         Returns:
             Lista de segmentos con información de hablante
         """
-        if not os.path.exists(audio_path):
-            raise FileNotFoundError(f"Archivo de audio no encontrado: {audio_path}")
+        return segments_to_dicts(self.diarize_as_arrays(
+            audio_path,
+            num_speakers=num_speakers,
+            min_speakers=min_speakers,
+            max_speakers=max_speakers,
+            chunk_duration=chunk_duration
+        ))
+    
+    def diarize_as_arrays(
+        self, 
+        audio_path: Union[str, "np.ndarray"],
+        num_speakers: Optional[int] = None,
+        min_speakers: Optional[int] = None,
+        max_speakers: Optional[int] = None,
+        chunk_duration: Optional[int] = CHUNK_SECONDS
+    ) -> Dict:
+        """
+        Igual que diarize(), pero devuelve los segmentos como columnas NumPy
+        en lugar de un dict por segmento (menos memoria, agregaciones vectorizadas).
+        
+        Returns:
+            Dict con "start" y "end" (float64) y "speaker" (str), uno por segmento
+        """
+        import numpy as np
         
-        logger.info(f"Iniciando diarización de: {audio_path}")
+        if isinstance(audio_path, str):
+            logger.info(f"Iniciando diarización de: {audio_path}")
+        else:
+            logger.info(f"Iniciando diarización de audio en memoria ({len(audio_path) / SAMPLE_RATE:.1f} s)")
         
         try:
             # Configurar parámetros
@@ -136,62 +210,55 @@ class SpeakerDiarizer:
             if max_speakers:
                 params["max_speakers"] = max_speakers
             
-            # Pre-cargar el audio usando librosa (soporta más formatos vía FFmpeg)
-            # Esto evita el error de AudioDecoder y soporta webm, mp3, wav, etc.
-            logger.info("Cargando audio con librosa...")
-
-            # librosa.load devuelve (waveform, sample_rate)
-            # waveform es mono por defecto, necesitamos convertir a stereo si es necesario
-            # Usar la referencia almacenada en self.librosa (importada en __init__)
-            if not hasattr(self, 'librosa') or self.librosa is None:
-                # Intentar importar de forma perezosa si por alguna razón no está disponible
-                import importlib
-                self.librosa = importlib.import_module('librosa')
+            if isinstance(audio_path, str):
+                # Pre-cargar el audio usando librosa (soporta más formatos vía FFmpeg)
+                # Esto evita el error de AudioDecoder y soporta webm, mp3, wav, etc.
+                logger.info("Cargando audio con librosa...")
 
-            waveform, sample_rate = self.librosa.load(audio_path, sr=None, mono=False)
-            
-            # Convertir a tensor de PyTorch
-            waveform = torch.from_numpy(waveform).float()
+                # Cargar directamente a 16 kHz mono, que es lo que usa pyannote internamente.
+                # El loader ya falla si el archivo no existe: no hace falta un stat previo
+                try:
+                    waveform, sample_rate = self.librosa.load(audio_path, sr=SAMPLE_RATE, mono=True)
+                except (FileNotFoundError, RuntimeError) as e:
+                    raise FileNotFoundError(f"Archivo de audio no encontrado o ilegible: {audio_path}") from e
+            else:
+                # Ya decodificado a 16 kHz mono (mismo formato que Whisper)
+                waveform, sample_rate = np.asarray(audio_path, dtype=np.float32), SAMPLE_RATE
             
-            # Ajustar dimensiones según lo que devuelva librosa
-            # Si es mono: (samples,) -> (1, samples)
-            # Si es stereo: (2, samples) -> ya está bien
-            if waveform.ndim == 1:
-                waveform = waveform.unsqueeze(0)
+            # Convertir a tensor de PyTorch: (samples,) -> (1, samples)
+            waveform = torch.from_numpy(waveform).float().unsqueeze(0)
             
             logger.info(f"Audio cargado: shape={waveform.shape}, sample_rate={sample_rate}")
             
-            # Crear diccionario de audio para pyannote
-            audio_dict = {
-                "waveform": waveform,
-                "sample_rate": sample_rate
-            }
-            
-            # Ejecutar diarización con audio pre-cargado
-            logger.info("Ejecutando pipeline de diarización...")
-            diarization_output = self.pipeline(audio_dict, **params)
+            columns = None
+            chunk_samples = int(chunk_duration * sample_rate) if chunk_duration else 0
+            if chunk_samples and waveform.shape[-1] > chunk_samples:
+                columns = self._diarize_in_chunks(waveform, sample_rate, params, chunk_samples)
             
-            # En pyannote.audio 3.x, la pipeline devuelve un DiarizeOutput
-            # que contiene un Annotation en .speaker_diarization
-            if hasattr(diarization_output, 'speaker_diarization'):
-                # Nuevo formato (pyannote.audio 3.x)
-                diarization = diarization_output.speaker_diarization
-            else:
-                # Formato antiguo o directo
-                diarization = diarization_output
+            if columns is None:
+                # Ejecutar diarización con audio pre-cargado
+                logger.info("Ejecutando pipeline de diarización...")
+                diarization, _ = self._run_pipeline(
+                    {"waveform": waveform, "sample_rate": sample_rate},
+                    params
+                )
+                
+                # Convertir a columnas usando itertracks
+                columns = ([], [], [])
+                for turn, _, speaker in diarization.itertracks(yield_label=True):
+                    columns[0].append(turn.start)
+                    columns[1].append(turn.end)
+                    columns[2].append(speaker)
             
-            # Convertir a formato estructurado usando itertracks
-            segments = []
-            for turn, _, speaker in diarization.itertracks(yield_label=True):
-                segments.append({
-                    "start": turn.start,
-                    "end": turn.end,
-                    "speaker": speaker,
-                    "duration": turn.end - turn.start
-                })
+            starts, ends, speakers = columns
+            segments = {
+                "start": np.asarray(starts, dtype=np.float64),
+                "end": np.asarray(ends, dtype=np.float64),
+                "speaker": np.asarray(speakers, dtype=str)
+            }
             
             # Obtener número de hablantes únicos
-            unique_speakers = len(set(seg["speaker"] for seg in segments))
+            unique_speakers = len(np.unique(segments["speaker"]))
             logger.info(f"Diarización completada. Hablantes detectados: {unique_speakers}")
             
             return segments
@@ -200,6 +267,174 @@ class SpeakerDiarizer:
             logger.error(f"Error durante la diarización: {e}")
             raise
     
+    def _run_pipeline(self, audio_dict: Dict, params: Dict, return_embeddings: bool = False):
+        """
+        Ejecuta el pipeline y normaliza su salida.
+        
+        Returns:
+            Tupla (Annotation, embeddings por hablante o None)
+        """
+        if return_embeddings and "return_embeddings" in inspect.signature(self.pipeline.apply).parameters:
+            params = {**params, "return_embeddings": True}
+        
+        # Sin autograd ni barra de progreso: solo inferencia
+        with torch.inference_mode():
+            output = self.pipeline(audio_dict, hook=None, **params)
+        
+        # En pyannote.audio 4.x, la pipeline devuelve un DiarizeOutput
+        # que contiene un Annotation en .speaker_diarization
+        if hasattr(output, 'speaker_diarization'):
+            return output.speaker_diarization, getattr(output, 'speaker_embeddings', None)
+        # pyannote.audio 3.x con return_embeddings=True devuelve (Annotation, centroides)
+        if isinstance(output, tuple):
+            return output[0], output[1]
+        return output, None
+    
+    def _diarize_in_chunks(
+        self,
+        waveform,
+        sample_rate: int,
+        params: Dict,
+        chunk_samples: int
+    ) -> Optional[tuple]:
+        """
+        Diariza el audio por ventanas para acotar la memoria en audios largos.
+        Los hablantes de cada ventana se enlazan entre ventanas comparando sus
+        embeddings; num_speakers/min_speakers/max_speakers se aplican al total.
+        
+        Returns:
+            Tupla de listas (inicios, finales, hablantes), o None si el pipeline no
+            expone embeddings (en ese caso hay que diarizar el audio completo de una vez)
+        """
+        total_samples = waveform.shape[-1]
+        starts = list(range(0, total_samples, chunk_samples))
+        # Una cola muy corta no tiene voz suficiente para un embedding fiable: unirla a la anterior
+        if len(starts) > 1 and total_samples - starts[-1] < chunk_samples // 4:
+            starts.pop()
+        
+        # Un número exacto (o mínimo) de hablantes no tiene por qué cumplirse en
+        # cada ventana: por ventana solo se acota el máximo y el resto se impone al enlazar
+        min_speakers = params.get("num_speakers") or params.get("min_speakers")
+        max_speakers = params.get("num_speakers") or params.get("max_speakers")
+        chunk_params = {}
+        if max_speakers:
+            chunk_params["max_speakers"] = max_speakers
+        
+        windows = []
+        tracks = []
+        for idx, start in enumerate(starts):
+            end = starts[idx + 1] if idx + 1 < len(starts) else total_samples
+            offset = start / sample_rate
+            logger.info(f"Diarizando ventana {idx + 1}/{len(starts)} (desde {offset:.0f}s)")
+            
+            chunk = waveform[:, start:end]
+            diarization, embeddings = self._run_pipeline(
+                {"waveform": chunk, "sample_rate": sample_rate},
+                chunk_params,
+                return_embeddings=True
+            )
+            del chunk
+            if self.device == "cuda":
+                torch.cuda.empty_cache()
+            
+            if embeddings is None:
+                logger.warning(
+                    "El pipeline no devuelve embeddings de hablantes; "
+                    "se diarizará el audio completo en una sola pasada"
+                )
+                return None
+            
+            windows.append((diarization.labels(), embeddings))
+            tracks.append([
+                (turn.start + offset, turn.end + offset, speaker)
+                for turn, _, speaker in diarization.itertracks(yield_label=True)
+            ])
+        
+        mappings = self._link_speakers(windows, min_speakers=min_speakers, max_speakers=max_speakers)
+        seg_starts, seg_ends, seg_speakers = [], [], []
+        for mapping, window_tracks in zip(mappings, tracks):
+            for start, end, speaker in window_tracks:
+                seg_starts.append(start)
+                seg_ends.append(end)
+                seg_speakers.append(mapping[speaker])
+        
+        return seg_starts, seg_ends, seg_speakers
+    
+    @staticmethod
+    def _link_speakers(
+        windows: List[tuple],
+        min_speakers: Optional[int] = None,
+        max_speakers: Optional[int] = None,
+        threshold: float = SPEAKER_LINK_THRESHOLD
+    ) -> List[Dict[str, str]]:
+        """
+        Asigna a los hablantes locales de cada ventana un hablante global.
+        
+        Clustering aglomerativo de los embeddings de todas las ventanas: se une
+        siempre el par de grupos más cercano, sin juntar nunca dos hablantes de la
+        misma ventana, hasta que la distancia supera `threshold` y se cumple
+        `max_speakers`, o hasta llegar a `min_speakers`.
+        
+        Args:
+            windows: (etiquetas, embeddings) de cada ventana, en el mismo orden
+            min_speakers: Número mínimo de hablantes globales (opcional)
+            max_speakers: Número máximo de hablantes globales (opcional)
+            threshold: Distancia coseno máxima para unir dos grupos
+        
+        Returns:
+            Mapeo etiqueta local -> etiqueta global de cada ventana
+        """
+        import numpy as np
+        
+        # Un grupo por hablante local: suma de embeddings normalizados (None si
+        # no hay embedding válido: nunca se une) y ventanas en las que aparece
+        sums, window_sets, members = [], [], []
+        for w, (labels, embeddings) in enumerate(windows):
+            embeddings = list(embeddings)
+            for i, label in enumerate(labels):
+                emb = np.asarray(embeddings[i], dtype=np.float64) if i < len(embeddings) else None
+                norm = np.linalg.norm(emb) if emb is not None else 0.0
+                valid = bool(np.isfinite(norm) and norm > 0)
+                sums.append(emb / norm if valid else None)
+                window_sets.append({w})
+                members.append([(w, label)])
+        
+        active = list(range(len(sums)))
+        while len(active) > 1 and not (min_speakers and len(active) <= min_speakers):
+            best, best_dist = None, np.inf
+            for a, i in enumerate(active):
+                if sums[i] is None:
+                    continue
+                for j in active[a + 1:]:
+                    if sums[j] is None or window_sets[i] & window_sets[j]:
+                        continue
+                    dist = 1.0 - float(np.dot(sums[i], sums[j]) / (np.linalg.norm(sums[i]) * np.linalg.norm(sums[j])))
+                    if dist < best_dist:
+                        best, best_dist = (i, j), dist
+            if best is None:
+                break
+            if best_dist >= threshold and not (max_speakers and len(active) > max_speakers):
+                break
+            i, j = best
+            sums[i] = sums[i] + sums[j]
+            window_sets[i] |= window_sets[j]
+            members[i].extend(members[j])
+            active.remove(j)
+        
+        if max_speakers and len(active) > max_speakers:
+            logger.warning(
+                f"No se pudo reducir a {max_speakers} hablantes sin unir hablantes de una misma ventana "
+                f"({len(active)} hablantes)"
+            )
+        
+        # Numerar los hablantes globales por orden de aparición (cada grupo
+        # conserva el índice de su primer hablante local y `active` sigue ordenada)
+        mappings = [{} for _ in windows]
+        for n, c in enumerate(active):
+            for w, label in members[c]:
+                mappings[w][label] = f"SPEAKER_{n:02d}"
+        return mappings
+    
     def get_speaker_segments(self, audio_path: str, **kwargs) -> Dict[str, List[Dict]]:
         """
         Organiza los segmentos por hablante.
@@ -237,36 +472,57 @@ class SpeakerDiarizer:
         Returns:
             Estadísticas por hablante
         """
-        segments = self.diarize(audio_path, **kwargs)
+        import numpy as np
         
-        stats = {}
-        for seg in segments:
-            speaker = seg["speaker"]
-            if speaker not in stats:
-                stats[speaker] = {
-                    "total_time": 0.0,
-                    "num_segments": 0,
-                    "segments": []
-                }
-            
-            stats[speaker]["total_time"] += seg["duration"]
-            stats[speaker]["num_segments"] += 1
-            stats[speaker]["segments"].append({
-                "start": seg["start"],
-                "end": seg["end"]
-            })
+        segments = self.diarize_as_arrays(audio_path, **kwargs)
+        starts, ends = segments["start"], segments["end"]
         
-        # Calcular porcentajes
-        total_speaking_time = sum(s["total_time"] for s in stats.values())
-        for speaker in stats:
-            stats[speaker]["percentage"] = (
-                stats[speaker]["total_time"] / total_speaking_time * 100
-                if total_speaking_time > 0 else 0
-            )
+        # Totales por hablante en una sola pasada vectorizada
+        speakers, idx = np.unique(segments["speaker"], return_inverse=True)
+        totals = np.bincount(idx, weights=ends - starts, minlength=len(speakers))
+        counts = np.bincount(idx, minlength=len(speakers))
+        total_speaking_time = float(totals.sum())
+        
+        stats = {}
+        for i, speaker in enumerate(speakers.tolist()):
+            mask = idx == i
+            stats[speaker] = {
+                "total_time": float(totals[i]),
+                "num_segments": int(counts[i]),
+                "segments": [
+                    {"start": start, "end": end}
+                    for start, end in zip(starts[mask].tolist(), ends[mask].tolist())
+                ],
+                # Calcular porcentajes
+                "percentage": (
+                    float(totals[i]) / total_speaking_time * 100
+                    if total_speaking_time > 0 else 0
+                )
+            }
         
         return stats
 
 
+def segments_to_dicts(segments: Dict) -> List[Dict]:
+    """
+    Convierte la salida de diarize_as_arrays() al formato de un dict por segmento.
+    
+    Args:
+        segments: Dict con columnas "start", "end" y "speaker"
+    
+    Returns:
+        Lista de segmentos con start, end, speaker y duration
+    """
+    return [
+        {"start": start, "end": end, "speaker": speaker, "duration": end - start}
+        for start, end, speaker in zip(
+            segments["start"].tolist(),
+            segments["end"].tolist(),
+            segments["speaker"].tolist()
+        )
+    ]
+
+
 # Ejemplo de uso
 if __name__ == "__main__":
     # Requiere token de Hugging Face
@@ -1,45 +1,350 @@
+"""
+Módulo de transcripción de audio usando Whisper (faster-whisper, openai-whisper o whisper_trt)
+"""
 import os
-from typing import Dict, Optional
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Optional, Union
 import logging
 
+if TYPE_CHECKING:
+    import numpy as np
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# Backends soportados; "auto" elige faster-whisper si está instalado y si no openai-whisper
+BACKENDS = ("faster_whisper", "whisper", "whisper_trt")
+
+# Precisiones soportadas; "auto" elige según dispositivo (y `quantize` en CPU)
+PRECISIONS = ("auto", "fp32", "fp16", "int8", "int8_float16")
+
+# Equivalencia con los compute_type de CTranslate2 (faster-whisper)
+_CT2_COMPUTE_TYPES = {
+    "fp32": "float32",
+    "fp16": "float16",
+    "int8": "int8",
+    "int8_float16": "int8_float16"
+}
+
+# Directorio donde se guardan los engines TensorRT ya construidos
+TRT_CACHE_DIR = os.path.expanduser("~/.cache/whisper_trt")
+
+# Referencias a torch/whisper, importados una sola vez (ver _lazy)
+_torch = None
+_whisper = None
+_cuda_available = None
+
+# Modelos ya cargados, compartidos entre instancias: (modelo, dispositivo, backend, precisión) -> modelo
+_MODEL_CACHE = {}
+# _MODEL_LOCK protege solo los diccionarios; cada carga se serializa con el lock de su clave
+_MODEL_LOCK = threading.Lock()
+_LOAD_LOCKS = {}
+
+# Hilos para decodificar audio (FFmpeg) mientras la GPU/CPU trabaja en otra transcripción
+_IO_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="audio-io")
+
+# Whisper trabaja con audio a 16 kHz en ventanas de 30 s
+SAMPLE_RATE = 16000
+WINDOW_SAMPLES = 30 * SAMPLE_RATE
+
+
+def resolve_backend(backend: str = "auto") -> str:
+    """Backend efectivo: "auto" elige faster-whisper si está instalado y si no openai-whisper."""
+    if backend == "auto":
+        import importlib
+        # Preferir faster-whisper (CTranslate2); openai-whisper queda como respaldo
+        try:
+            importlib.import_module('faster_whisper')
+            return "faster_whisper"
+        except Exception:
+            return "whisper"
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend no soportado: {backend}. Opciones: auto, {', '.join(BACKENDS)}")
+    return backend
+
+
+def _get_or_load_model(key: tuple, loader):
+    """Devuelve el modelo cacheado para `key` o lo carga con `loader()` una sola vez.
+
+    La carga se hace fuera de _MODEL_LOCK: cargar un modelo no bloquea la carga
+    de otros ni clear_cache/release, solo a quien espera esa misma clave.
+    """
+    with _MODEL_LOCK:
+        model = _MODEL_CACHE.get(key)
+        if model is None:
+            key_lock = _LOAD_LOCKS.setdefault(key, threading.Lock())
+    if model is not None:
+        logger.info(f"Reutilizando modelo ya cargado: {key}")
+        return model
+
+    with key_lock:
+        # Otro hilo pudo terminar de cargarlo mientras se esperaba el lock
+        with _MODEL_LOCK:
+            model = _MODEL_CACHE.get(key)
+        if model is None:
+            model = loader()
+            with _MODEL_LOCK:
+                _MODEL_CACHE[key] = model
+        return model
+
+
+def _lazy():
+    """
+    Importa torch y whisper la primera vez y guarda las referencias a nivel de
+    módulo, junto con la disponibilidad de CUDA (consultarla inicializa el driver).
+    """
+    global _torch, _whisper, _cuda_available
+    if _torch is None:
+        import importlib
+        torch = importlib.import_module('torch')
+        whisper = importlib.import_module('whisper')
+        _cuda_available = torch.cuda.is_available()
+        _whisper = whisper
+        _torch = torch
+    return _torch, _whisper, _cuda_available
+
+
 class AudioTranscriber:
     
-    def __init__(self, model_name: str = "base"):
+    def __init__(self, model_name: str = "base", quantize: bool = False, backend: str = "auto", precision: str = "auto", use_cuda_graph: bool = False):
         self.model_name = model_name
+        # Solo openai-whisper en GPU: repetir el encoder con un CUDA graph (forma fija de 30 s)
+        self.use_cuda_graph = use_cuda_graph
+        # Con precision="auto" en CPU, usar pesos int8 (cuantización dinámica; la
+        # estática rompe Whisper). Desactivado por defecto: cambia la precisión del
+        # modelo; para activarlo sin tocar código, WHISPER_PRECISION=int8
+        self.quantize = quantize
+        if precision not in PRECISIONS:
+            raise ValueError(f"Precisión no soportada: {precision}. Opciones: {', '.join(PRECISIONS)}")
+        # Se sustituye por la precisión efectiva al cargar el modelo
+        self.precision = precision
+        backend = resolve_backend(backend)
+        self.backend = backend
+
+        if backend == "faster_whisper":
+            self._load_faster_whisper()
+        elif backend == "whisper_trt":
+            self._load_whisper_trt()
+        else:
+            self._load_whisper()
+
+    def _load_faster_whisper(self):
+        import importlib
+        faster_whisper = importlib.import_module('faster_whisper')
+        ctranslate2 = importlib.import_module('ctranslate2')
+        self.device = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+        if self.precision == "auto":
+            if self.device == "cpu":
+                self.precision = "int8" if self.quantize else "fp32"
+            elif "int8_float16" in ctranslate2.get_supported_compute_types("cuda"):
+                # Pesos int8 y activaciones FP16: el modo más rápido en GPUs que lo soportan (>= sm_75)
+                self.precision = "int8_float16"
+            else:
+                self.precision = "fp16"
+        compute_type = _CT2_COMPUTE_TYPES[self.precision]
+
+        def load():
+            logger.info(f"Inicializando faster-whisper modelo '{self.model_name}' en dispositivo '{self.device}' ({compute_type})")
+            try:
+                model = faster_whisper.WhisperModel(self.model_name, device=self.device, compute_type=compute_type)
+                logger.info(f"Modelo faster-whisper '{self.model_name}' cargado exitosamente")
+                return model
+            except Exception as e:
+                logger.error(f"Error al cargar modelo faster-whisper: {e}")
+                raise
+
+        self.model = _get_or_load_model((self.model_name, self.device, self.backend, self.precision), load)
+
+    def _load_whisper_trt(self):
+        import importlib
+        try:
+            load_trt_model = importlib.import_module('whisper_trt').load_trt_model
+        except Exception as e:
+            logger.error(f"No se pudo importar whisper_trt: {e}")
+            raise
+
+        self.device = "cuda"
+        if self.precision != "auto":
+            logger.warning(f"whisper_trt ignora precision='{self.precision}': la fija el engine TensorRT")
+        self.precision = "fp16"
+        # Construir el engine es caro: se guarda en disco y se reutiliza en siguientes arranques
+        os.makedirs(TRT_CACHE_DIR, exist_ok=True)
+        engine_path = os.path.join(TRT_CACHE_DIR, f"{self.model_name}.pth")
+
+        def load():
+            logger.info(f"Inicializando whisper_trt modelo '{self.model_name}' (engine: {engine_path})")
+            try:
+                model = load_trt_model(self.model_name, path=engine_path)
+                logger.info(f"Modelo whisper_trt '{self.model_name}' cargado exitosamente")
+                return model
+            except Exception as e:
+                logger.error(f"Error al cargar modelo whisper_trt: {e}")
+                raise
+
+        self.model = _get_or_load_model((self.model_name, self.device, self.backend, self.precision), load)
+
+    def _load_whisper(self):
         # Importar torch y whisper de forma perezosa para evitar carga innecesaria
         try:
-            import importlib
-            torch = importlib.import_module('torch')
-            whisper = importlib.import_module('whisper')
+            torch, whisper, cuda_available = _lazy()
         except Exception as e:
             logger.error(f"No se pudieron importar torch/whisper: {e}")
             raise
 
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        logger.info(f"Inicializando Whisper modelo '{model_name}' en dispositivo '{self.device}'")
+        self.device = "cuda" if cuda_available else "cpu"
+        self.precision = self._resolve_whisper_precision()
+
+        def load():
+            logger.info(f"Inicializando Whisper modelo '{self.model_name}' en dispositivo '{self.device}'")
+            try:
+                model = whisper.load_model(self.model_name, device=self.device)
+                logger.info(f"Modelo Whisper '{self.model_name}' cargado exitosamente")
+            except Exception as e:
+                logger.error(f"Error al cargar modelo Whisper: {e}")
+                raise
+
+            if self.precision == "fp16":
+                # FP16 en GPU: evita que whisper convierta los pesos FP32 a FP16 en cada forward.
+                # LayerNorm se queda en FP32 porque whisper la ejecuta siempre en FP32
+                model = model.half()
+                for module in model.modules():
+                    if isinstance(module, torch.nn.LayerNorm):
+                        module.float()
+            elif self.precision == "int8":
+                size_before = _model_nbytes(model, torch)
+                model = _quantize_dynamic(model, torch)
+                size_after = _model_nbytes(model, torch)
+                logger.info(
+                    f"Modelo cuantizado a int8: {size_before / 1e6:.0f} MB -> {size_after / 1e6:.0f} MB"
+                )
+
+            if self.device == "cuda":
+                # Dentro de load(): los modelos cacheados ya están calentados
+                self._warmup(model, torch, whisper)
+                if self.use_cuda_graph:
+                    try:
+                        _capture_encoder_graph(model, torch)
+                        logger.info("Encoder de Whisper capturado en un CUDA graph")
+                    except Exception as e:
+                        logger.warning(f"No se pudo capturar el CUDA graph del encoder: {e}")
+            return model
+
+        use_graph = self.device == "cuda" and self.use_cuda_graph
+        self.model = _get_or_load_model((self.model_name, self.device, self.backend, self.precision, use_graph), load)
+
+    def _warmup(self, model, torch, whisper):
+        """
+        Paga al cargar el modelo el coste de la primera llamada en GPU (contexto,
+        autotune de cuDNN, compilación de kernels) decodificando una ventana de silencio.
+        """
+        torch.backends.cudnn.benchmark = True
         try:
-            self.model = whisper.load_model(model_name, device=self.device)
-            logger.info(f"Modelo Whisper '{model_name}' cargado exitosamente")
+            logger.info("Calentando modelo Whisper en GPU...")
+            fp16 = self.precision == "fp16"
+            mel = torch.zeros(
+                model.dims.n_mels, whisper.audio.N_FRAMES,
+                device=self.device,
+                dtype=torch.float16 if fp16 else torch.float32
+            )
+            options = whisper.DecodingOptions(language="en", fp16=fp16, sample_len=1)
+            with torch.inference_mode():
+                whisper.decode(model, mel, options)
+            torch.cuda.synchronize()
         except Exception as e:
-            logger.error(f"Error al cargar modelo Whisper: {e}")
-            raise
+            logger.warning(f"No se pudo calentar el modelo Whisper: {e}")
+
+    def _resolve_whisper_precision(self) -> str:
+        """Precisión efectiva para openai-whisper: FP16 solo en GPU, int8 dinámico solo en CPU."""
+        requested = self.precision
+        if requested == "auto":
+            if self.device == "cuda":
+                return "fp16"
+            return "int8" if self.quantize else "fp32"
+        if self.device == "cuda" and requested in ("int8", "int8_float16"):
+            # La cuantización dinámica de PyTorch solo tiene kernels de CPU
+            logger.warning(f"precision='{requested}' no está disponible en GPU con openai-whisper; se usa fp16")
+            return "fp16"
+        if self.device == "cpu" and requested in ("fp16", "int8_float16"):
+            fallback = "int8" if requested == "int8_float16" else "fp32"
+            logger.warning(f"precision='{requested}' no está disponible en CPU con openai-whisper; se usa {fallback}")
+            return fallback
+        return requested
+
+    @classmethod
+    def clear_cache(cls):
+        """Libera todos los modelos cacheados (y la memoria CUDA reservada, si la hay)."""
+        with _MODEL_LOCK:
+            _MODEL_CACHE.clear()
+            _LOAD_LOCKS.clear()
+        torch = _torch or sys.modules.get('torch')
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    
+    def release(self):
+        """
+        Quita el modelo de esta instancia de la caché compartida, para que se
+        libere en cuanto no lo use nadie más (p. ej. un job aún en curso).
+        """
+        with _MODEL_LOCK:
+            for key in [k for k, m in _MODEL_CACHE.items() if m is self.model]:
+                del _MODEL_CACHE[key]
+        torch = _torch or sys.modules.get('torch')
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
     
-    def transcribe(self, audio_path: str, language: Optional[str] = None, task: str = "transcribe", **kwargs) -> Dict:
+    def load_audio(self, audio_path: str):
+        """Decodifica el archivo a un array float32 mono a 16 kHz (el formato que espera Whisper)."""
         if not os.path.exists(audio_path):
             raise FileNotFoundError(f"Archivo de audio no encontrado: {audio_path}")
-        
-        logger.info(f"Iniciando transcripción de: {audio_path}")
+        import importlib
+        if self.backend == "faster_whisper":
+            return importlib.import_module('faster_whisper').decode_audio(audio_path)
+        return _lazy()[1].load_audio(audio_path)
+
+    def prefetch(self, audio_path: str) -> Future:
+        """
+        Decodifica el audio en segundo plano. El resultado (`future.result()`)
+        se puede pasar directamente a `transcribe`, de modo que FFmpeg trabaja
+        mientras el modelo procesa el archivo anterior. Si ya es un array, se
+        devuelve tal cual.
+        """
+        if not isinstance(audio_path, str):
+            future = Future()
+            future.set_result(audio_path)
+            return future
+        return _IO_POOL.submit(self.load_audio, audio_path)
+
+    def transcribe(self, audio_path: Union[str, "np.ndarray"], language: Optional[str] = None, task: str = "transcribe", **kwargs) -> Dict:
+        # Se acepta una ruta o el audio ya decodificado (array float32 a 16 kHz)
+        if isinstance(audio_path, str):
+            if not os.path.exists(audio_path):
+                raise FileNotFoundError(f"Archivo de audio no encontrado: {audio_path}")
+            logger.info(f"Iniciando transcripción de: {audio_path}")
+        else:
+            logger.info(f"Iniciando transcripción de audio en memoria ({len(audio_path) / SAMPLE_RATE:.1f} s)")
         
         try:
-            options = {"task": task, "verbose": False, **kwargs}
-            if language:
-                options["language"] = language
-            
-            result = self.model.transcribe(audio_path, **options)
+            if self.backend == "faster_whisper":
+                result = self._transcribe_faster_whisper(audio_path, language, task, **kwargs)
+            elif self.backend == "whisper_trt":
+                audio = self.load_audio(audio_path) if isinstance(audio_path, str) else audio_path
+                result = self._transcribe_whisper_trt(audio)
+            else:
+                audio = self.load_audio(audio_path) if isinstance(audio_path, str) else audio_path
+                torch = _lazy()[0]
+                options = {"task": task, "verbose": False, "fp16": self.precision == "fp16", **kwargs}
+                if language:
+                    options["language"] = language
+                
+                if self.device == "cuda":
+                    # Copia asíncrona desde memoria fijada: el espectrograma mel se calcula ya en la GPU
+                    audio = torch.from_numpy(audio).pin_memory().to(self.device, non_blocking=True)
+                
+                with torch.inference_mode():
+                    result = self.model.transcribe(audio, **options)
             logger.info(f"Transcripción completada. Texto: {len(result.get('text', ''))} caracteres")
             
             return {
@@ -53,24 +358,203 @@ class AudioTranscriber:
             logger.error(f"Error durante la transcripción: {e}")
             raise
     
-    def transcribe_with_timestamps(self, audio_path: str, **kwargs) -> list:
+    def transcribe_many(self, audio_paths: list, language: Optional[str] = None, task: str = "transcribe", batch_size: int = 8, **kwargs) -> list:
+        """
+        Transcribe varios archivos (rutas o arrays ya decodificados) y devuelve un
+        resultado por archivo, en el mismo orden.
+        
+        Con openai-whisper los clips de hasta 30 s se agrupan en lotes de
+        `batch_size` y se codifican en una sola pasada del modelo. El resto de
+        archivos (y los demás backends) se transcriben uno a uno, decodificando
+        el siguiente archivo en segundo plano.
+        """
+        results = [None] * len(audio_paths)
+        batch = []
+        pending = self.prefetch(audio_paths[0]) if audio_paths else None
+        
+        for idx in range(len(audio_paths)):
+            audio = pending.result()
+            pending = self.prefetch(audio_paths[idx + 1]) if idx + 1 < len(audio_paths) else None
+            
+            if self.backend == "whisper" and len(audio) <= WINDOW_SAMPLES:
+                batch.append((idx, audio))
+                if len(batch) == batch_size:
+                    self._transcribe_batch(batch, results, language, task, **kwargs)
+                    batch = []
+            else:
+                results[idx] = self.transcribe(audio, language=language, task=task, **kwargs)
+        
+        if batch:
+            self._transcribe_batch(batch, results, language, task, **kwargs)
+        return results
+    
+    def _transcribe_batch(self, batch: list, results: list, language: Optional[str], task: str, **kwargs):
+        """Decodifica un lote de clips cortos (<= 30 s) con una sola llamada a whisper.decode."""
+        torch, whisper, _ = _lazy()
+        
+        # Solo las opciones de decodificación aplican; las de transcripción larga se ignoran
+        fields = whisper.DecodingOptions.__dataclass_fields__
+        options = whisper.DecodingOptions(
+            task=task,
+            language=language,
+            fp16=self.precision == "fp16",
+            **{k: v for k, v in kwargs.items() if k in fields}
+        )
+        logger.info(f"Transcribiendo lote de {len(batch)} clips cortos en una sola pasada")
+        
+        with torch.inference_mode():
+            mels = torch.stack([
+                whisper.log_mel_spectrogram(
+                    whisper.pad_or_trim(torch.from_numpy(audio)),
+                    self.model.dims.n_mels,
+                    device=self.device
+                )
+                for _, audio in batch
+            ])
+            decoded = whisper.decode(self.model, mels, options)
+        
+        for (idx, audio), res in zip(batch, decoded):
+            results[idx] = {
+                "text": res.text,
+                "segments": [{
+                    "id": 0,
+                    "start": 0.0,
+                    "end": len(audio) / SAMPLE_RATE,
+                    "text": res.text,
+                    "avg_logprob": res.avg_logprob,
+                    "compression_ratio": res.compression_ratio,
+                    "no_speech_prob": res.no_speech_prob
+                }],
+                "language": res.language,
+                "model": self.model_name,
+                "device": self.device
+            }
+    
+    def _transcribe_faster_whisper(self, audio_path, language: Optional[str], task: str, **kwargs) -> Dict:
+        # faster-whisper devuelve un generador: materializarlo una sola vez
+        segments, info = self.model.transcribe(audio_path, language=language, task=task, **kwargs)
+        segments = [
+            {
+                "id": seg.id,
+                "start": seg.start,
+                "end": seg.end,
+                "text": seg.text,
+                "avg_logprob": seg.avg_logprob,
+                "compression_ratio": seg.compression_ratio,
+                "no_speech_prob": seg.no_speech_prob
+            }
+            for seg in segments
+        ]
+        return {
+            "text": "".join(seg["text"] for seg in segments),
+            "segments": segments,
+            "language": info.language
+        }
+    
+    def _transcribe_whisper_trt(self, audio) -> Dict:
+        whisper = _lazy()[1]
+        # El engine TensorRT solo decodifica ventanas de 30 s: trocear el audio
+        # y usar cada ventana como segmento
+        window = whisper.audio.N_SAMPLES
+        segments = []
+        for idx, start in enumerate(range(0, len(audio), window)):
+            piece = audio[start:start + window]
+            text = self.model.transcribe(piece).get("text", "")
+            segments.append({
+                "id": idx,
+                "start": start / whisper.audio.SAMPLE_RATE,
+                "end": (start + len(piece)) / whisper.audio.SAMPLE_RATE,
+                "text": text,
+                "no_speech_prob": 0.0
+            })
+        return {
+            "text": " ".join(seg["text"].strip() for seg in segments),
+            "segments": segments,
+            # Los modelos de whisper_trt son solo en inglés (*.en)
+            "language": "en"
+        }
+    
+    def transcribe_with_timestamps(self, audio_path: Union[str, "np.ndarray"], **kwargs) -> list:
         result = self.transcribe(audio_path, **kwargs)
         segments = []
         for seg in result.get("segments", []):
+            # Normalizar el texto una sola vez; el conteo de palabras lo reutilizan las estadísticas
+            text = seg["text"].strip()
             segments.append({
                 "start": seg["start"],
                 "end": seg["end"],
-                "text": seg["text"].strip(),
+                "text": text,
+                "word_count": len(text.split()),
                 "confidence": seg.get("no_speech_prob", 0.0)
             })
         return segments
 
 
+def _quantize_dynamic(model, torch):
+    """Cuantiza dinámicamente a int8 las capas Linear de un modelo openai-whisper."""
+    for module in model.modules():
+        # whisper.model.Linear solo añade un cast de dtype (irrelevante en CPU/FP32),
+        # pero quantize_dynamic solo reconoce nn.Linear exacto
+        if isinstance(module, torch.nn.Linear) and type(module) is not torch.nn.Linear:
+            module.__class__ = torch.nn.Linear
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _capture_encoder_graph(model, torch):
+    """
+    Captura el encoder de openai-whisper en un CUDA graph para la forma fija
+    (1, n_mels, 3000) y lo sustituye por un envoltorio que repite el grafo.
+    Otras formas (p. ej. lotes de transcribe_many) usan el encoder normal.
+    """
+    encoder = model.encoder
+    dtype = encoder.conv1.weight.dtype
+    static_in = torch.zeros(1, model.dims.n_mels, 3000, device="cuda", dtype=dtype)
+
+    # La captura exige haber ejecutado antes el módulo en un stream secundario
+    stream = torch.cuda.Stream()
+    stream.wait_stream(torch.cuda.current_stream())
+    with torch.cuda.stream(stream), torch.no_grad():
+        for _ in range(3):
+            encoder(static_in)
+    torch.cuda.current_stream().wait_stream(stream)
+
+    graph = torch.cuda.CUDAGraph()
+    with torch.no_grad(), torch.cuda.graph(graph):
+        static_out = encoder(static_in)
+
+    class GraphedEncoder(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.encoder = encoder
+
+        def forward(self, x):
+            if x.shape != static_in.shape or x.device != static_in.device:
+                return self.encoder(x)
+            static_in.copy_(x)
+            graph.replay()
+            # La salida estática se sobrescribe en la siguiente llamada
+            return static_out.clone()
+
+    model.encoder = GraphedEncoder()
+    return model
+
+
+def _model_nbytes(model, torch) -> int:
+    """Tamaño aproximado en bytes de los pesos (incluye los empaquetados de capas cuantizadas)."""
+    total = 0
+    for value in model.state_dict().values():
+        tensors = value if isinstance(value, tuple) else (value,)
+        for t in tensors:
+            if isinstance(t, torch.Tensor):
+                total += t.numel() * t.element_size()
+    return total
+
+
 def get_available_models() -> list:
     return ["tiny", "base", "small", "medium", "large"]
 
 
-def estimate_model_memory(model_name: str) -> str:
+def estimate_model_memory(model_name: str, quantized: bool = False) -> str:
     memory_estimates = {
         "tiny": "~1 GB",
         "base": "~1 GB",
@@ -78,4 +562,12 @@ def estimate_model_memory(model_name: str) -> str:
         "medium": "~5 GB",
         "large": "~10 GB"
     }
-    return memory_estimates.get(model_name, "Desconocido")
+    quantized_estimates = {
+        "tiny": "~0.4 GB",
+        "base": "~0.6 GB",
+        "small": "~1 GB",
+        "medium": "~2.5 GB",
+        "large": "~5 GB"
+    }
+    estimates = quantized_estimates if quantized else memory_estimates
+    return estimates.get(model_name, "Desconocido")
\ No newline at end of file
@@ -1,12 +1,33 @@
 """
 Utilidades para combinar transcripción con diarización
 """
-from typing import List, Dict
+from bisect import bisect_right
+from collections import defaultdict
+from functools import lru_cache
+import io
+from itertools import accumulate, groupby
+from operator import itemgetter
+from typing import List, Dict, Optional
+import importlib
 import logging
+import os
+
+try:
+    import numpy as np
+except ImportError:  # sin numpy (ni numba) se usa el recorrido en Python puro
+    np = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# umask del proceso, para dar a las escrituras atómicas los permisos habituales
+# (leerla exige cambiarla: se hace una vez al importar, no en cada escritura)
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+# Kernel de alineación compilado con numba: None = sin intentar, False = no disponible
+_SPEAKER_KERNEL = None
+
 
 def ensure_upload_dirs(upload_dir: str):
     """Crear de forma segura la carpeta de uploads y subdirectorios usados por la aplicación.
@@ -53,6 +74,32 @@ def ensure_upload_dirs(upload_dir: str):
     }
 
 
+def atomic_write_bytes(path: str, data: bytes):
+    """Escribe `data` en un archivo temporal hermano y lo reemplaza atómicamente.
+
+    Así un lector de `path` (otro worker, la UI) nunca ve un archivo truncado.
+    El temporal tiene nombre único (dos escritores no se pisan) y no termina en
+    `.json`, para que el worker no lo tome por un job.
+    """
+    import tempfile
+
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp crea el archivo con permisos 0600: dejar los habituales (umask)
+        os.chmod(tmp, 0o666 & ~_UMASK)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
 def renumber_speakers(diarization_segments: List[Dict]) -> List[Dict]:
     """
     Renumera los hablantes para que comiencen desde SPEAKER_01 en lugar de SPEAKER_00.
@@ -63,24 +110,20 @@ def renumber_speakers(diarization_segments: List[Dict]) -> List[Dict]:
     Returns:
         Lista de segmentos con hablantes renumerados (SPEAKER_01, SPEAKER_02, etc.)
     """
-    # Obtener todos los hablantes únicos en orden de aparición
-    unique_speakers = []
-    for seg in diarization_segments:
-        speaker = seg["speaker"]
-        if speaker not in unique_speakers:
-            unique_speakers.append(speaker)
-    
-    # Crear mapeo de nombres antiguos a nuevos (comenzando desde 01)
-    speaker_mapping = {}
-    for idx, old_speaker in enumerate(unique_speakers, start=1):
-        speaker_mapping[old_speaker] = f"SPEAKER_{idx:02d}"
+    # Hablantes únicos en orden de aparición (dict conserva el orden de inserción)
+    # y mapeo de nombres antiguos a nuevos (comenzando desde 01)
+    speaker_mapping = {
+        old_speaker: f"SPEAKER_{idx:02d}"
+        for idx, old_speaker in enumerate(
+            dict.fromkeys(seg["speaker"] for seg in diarization_segments), start=1
+        )
+    }
     
     # Aplicar el mapeo a todos los segmentos
-    renumbered_segments = []
-    for seg in diarization_segments:
-        new_seg = seg.copy()
-        new_seg["speaker"] = speaker_mapping[seg["speaker"]]
-        renumbered_segments.append(new_seg)
+    renumbered_segments = [
+        {**seg, "speaker": speaker_mapping[seg["speaker"]]}
+        for seg in diarization_segments
+    ]
     
     logger.info(f"Hablantes renumerados: {speaker_mapping}")
     return renumbered_segments
@@ -103,59 +146,172 @@ def align_transcription_with_diarization(
     # Renombrar hablantes para que comiencen desde SPEAKER_01
     diarization_segments = renumber_speakers(diarization_segments)
     
+    # Proyectar una sola vez los segmentos de diarización en listas paralelas
+    dia_starts, dia_ends, dia_speakers, dia_max_ends, dia_order = project_diarization(
+        diarization_segments
+    )
+    
+    kernel = _get_speaker_kernel()
+    if kernel:
+        best = kernel(
+            np.array([s["start"] for s in transcription_segments], dtype=np.float64),
+            np.array([s["end"] for s in transcription_segments], dtype=np.float64),
+            np.array(dia_starts, dtype=np.float64),
+            np.array(dia_ends, dtype=np.float64),
+            np.array(dia_max_ends, dtype=np.float64),
+            np.array(dia_order, dtype=np.int64)
+        )
+        speakers = [dia_speakers[i] if i >= 0 else "UNKNOWN" for i in best.tolist()]
+    else:
+        speakers = [
+            find_speaker_for_segment(
+                seg["start"],
+                seg["end"],
+                dia_starts,
+                dia_ends,
+                dia_speakers,
+                dia_max_ends,
+                dia_order
+            )
+            for seg in transcription_segments
+        ]
+    
     aligned_segments = []
     
-    for trans_seg in transcription_segments:
+    for trans_seg, speaker in zip(transcription_segments, speakers):
         trans_start = trans_seg["start"]
         trans_end = trans_seg["end"]
-        trans_text = trans_seg["text"]
-        
-        # Encontrar el hablante con mayor overlap
-        speaker = find_speaker_for_segment(
-            trans_start, 
-            trans_end, 
-            diarization_segments
-        )
         
-        aligned_segments.append({
+        aligned_seg = {
             "start": trans_start,
             "end": trans_end,
-            "text": trans_text,
+            "text": trans_seg["text"],
             "speaker": speaker,
             "duration": trans_end - trans_start
-        })
+        }
+        if "word_count" in trans_seg:
+            aligned_seg["word_count"] = trans_seg["word_count"]
+        aligned_segments.append(aligned_seg)
     
     return aligned_segments
 
 
+def _assign_speakers(ts, te, ds, de, max_ends, order):
+    """
+    Versión por arrays de `find_speaker_for_segment`, pensada para compilarse
+    con numba. Devuelve, para cada segmento de transcripción, el índice (en
+    las listas ordenadas) del segmento de diarización elegido, o -1.
+    """
+    n = ts.shape[0]
+    m = ds.shape[0]
+    out = np.full(n, -1, dtype=np.int64)
+    for k in range(n):
+        start = ts[k]
+        end = te[k]
+        best_overlap = 0.0
+        best = -1
+        i = np.searchsorted(max_ends, start, side='right')
+        while i < m and ds[i] < end:
+            overlap = min(end, de[i]) - max(start, ds[i])
+            if overlap > best_overlap or (
+                overlap == best_overlap and overlap > 0 and order[i] < order[best]
+            ):
+                best_overlap = overlap
+                best = i
+            i += 1
+        out[k] = best
+    return out
+
+
+def _get_speaker_kernel():
+    """Compila `_assign_speakers` con numba la primera vez (False si numba no está instalado)."""
+    global _SPEAKER_KERNEL
+    if _SPEAKER_KERNEL is None:
+        try:
+            numba = importlib.import_module('numba')
+            if np is None:
+                raise ImportError("numpy no disponible")
+            _SPEAKER_KERNEL = numba.njit(cache=True)(_assign_speakers)
+        except Exception as e:
+            logger.info(f"numba no disponible, alineación en Python puro: {e}")
+            _SPEAKER_KERNEL = False
+    return _SPEAKER_KERNEL
+
+
+def project_diarization(diarization_segments: List[Dict]) -> tuple:
+    """
+    Proyecta los segmentos de diarización en listas paralelas ordenadas por inicio.
+    
+    Además del inicio, fin y hablante de cada segmento, precalcula el máximo
+    acumulado de los finales (permite localizar por búsqueda binaria el primer
+    segmento que puede solapar un instante, aunque los segmentos de pyannote
+    se solapen entre sí) y la posición original de cada segmento (para desempatar).
+    
+    Args:
+        diarization_segments: Segmentos de diarización
+    
+    Returns:
+        Tupla (inicios, finales, hablantes, max_finales, orden_original)
+    """
+    order = sorted(
+        range(len(diarization_segments)),
+        key=lambda k: diarization_segments[k]["start"]
+    )
+    starts = [diarization_segments[k]["start"] for k in order]
+    ends = [diarization_segments[k]["end"] for k in order]
+    speakers = [diarization_segments[k]["speaker"] for k in order]
+    max_ends = list(accumulate(ends, max))
+    return starts, ends, speakers, max_ends, order
+
+
 def find_speaker_for_segment(
     start: float, 
     end: float, 
-    diarization_segments: List[Dict]
+    dia_starts: List[float],
+    dia_ends: List[float],
+    dia_speakers: List[str],
+    dia_max_ends: Optional[List[float]] = None,
+    dia_order: Optional[List[int]] = None
 ) -> str:
     """
     Encuentra el hablante con mayor overlap temporal con el segmento dado.
     
+    Las listas deben estar ordenadas por inicio, tal como las devuelve
+    `project_diarization`. Ante empates gana el segmento que aparecía antes
+    en la lista original (`dia_order`).
+    
     Args:
         start: Tiempo de inicio del segmento
         end: Tiempo de fin del segmento
-        diarization_segments: Segmentos de diarización
+        dia_starts: Inicios de los segmentos de diarización
+        dia_ends: Finales de los segmentos de diarización
+        dia_speakers: Hablantes de los segmentos de diarización
+        dia_max_ends: Máximo acumulado de `dia_ends` (opcional)
+        dia_order: Posición original de cada segmento (opcional)
     
     Returns:
         Identificador del hablante
     """
     max_overlap = 0
     speaker = "UNKNOWN"
-    
-    for dia_seg in diarization_segments:
-        overlap = calculate_overlap(
-            start, end,
-            dia_seg["start"], dia_seg["end"]
-        )
-        
+    best_pos = -1
+    
+    # Todos los segmentos anteriores a i terminan antes de `start`
+    i = bisect_right(dia_max_ends, start) if dia_max_ends is not None else 0
+    n = len(dia_starts)
+    while i < n and dia_starts[i] < end:
+        # calculate_overlap en línea: se evita una llamada por segmento
+        seg_start = dia_starts[i]
+        seg_end = dia_ends[i]
+        overlap = (end if end < seg_end else seg_end) - (start if start > seg_start else seg_start)
         if overlap > max_overlap:
             max_overlap = overlap
-            speaker = dia_seg["speaker"]
+            speaker = dia_speakers[i]
+            best_pos = dia_order[i] if dia_order is not None else i
+        elif overlap == max_overlap and overlap > 0 and dia_order is not None and dia_order[i] < best_pos:
+            speaker = dia_speakers[i]
+            best_pos = dia_order[i]
+        i += 1
     
     return speaker
 
@@ -205,27 +361,11 @@ def format_as_text(segments: List[Dict]) -> str:
     [SPEAKER_00]: Hola, ¿cómo estás?
     [SPEAKER_01]: Muy bien, gracias.
     """
-    lines = []
-    current_speaker = None
-    current_text = []
-    
-    for seg in segments:
-        speaker = seg["speaker"]
-        text = seg["text"].strip()
-        
-        if speaker != current_speaker:
-            if current_text:
-                lines.append(f"[{current_speaker}]: {' '.join(current_text)}")
-            current_speaker = speaker
-            current_text = [text]
-        else:
-            current_text.append(text)
-    
-    # Agregar el último segmento
-    if current_text:
-        lines.append(f"[{current_speaker}]: {' '.join(current_text)}")
-    
-    return "\n\n".join(lines)
+    # Agrupar segmentos consecutivos del mismo hablante
+    return "\n\n".join(
+        f"[{speaker}]: {' '.join(seg['text'].strip() for seg in group)}"
+        for speaker, group in groupby(segments, key=itemgetter("speaker"))
+    )
 
 
 def format_as_detailed(segments: List[Dict]) -> str:
@@ -236,17 +376,17 @@ def format_as_detailed(segments: List[Dict]) -> str:
     [00:00:05 - 00:00:10] SPEAKER_00: Hola, ¿cómo estás?
     [00:00:10 - 00:00:15] SPEAKER_01: Muy bien, gracias.
     """
-    lines = []
-    
-    for seg in segments:
-        start_time = format_timestamp(seg["start"])
-        end_time = format_timestamp(seg["end"])
-        speaker = seg["speaker"]
-        text = seg["text"].strip()
-        
-        lines.append(f"[{start_time} - {end_time}] {speaker}: {text}")
+    buf = io.StringIO()
+    
+    for i, seg in enumerate(segments):
+        if i:
+            buf.write("\n")
+        buf.write(
+            f"[{format_timestamp(seg['start'])} - {format_timestamp(seg['end'])}] "
+            f"{seg['speaker']}: {seg['text'].strip()}"
+        )
     
-    return "\n".join(lines)
+    return buf.getvalue()
 
 
 def format_as_srt(segments: List[Dict]) -> str:
@@ -258,20 +398,18 @@ def format_as_srt(segments: List[Dict]) -> str:
     00:00:05,000 --> 00:00:10,000
     [SPEAKER_00]: Hola, ¿cómo estás?
     """
-    srt_lines = []
+    buf = io.StringIO()
     
     for i, seg in enumerate(segments, 1):
-        start_time = format_srt_timestamp(seg["start"])
-        end_time = format_srt_timestamp(seg["end"])
-        speaker = seg["speaker"]
-        text = seg["text"].strip()
-        
-        srt_lines.append(f"{i}")
-        srt_lines.append(f"{start_time} --> {end_time}")
-        srt_lines.append(f"[{speaker}]: {text}")
-        srt_lines.append("")  # Línea en blanco
+        if i > 1:
+            buf.write("\n")  # Línea en blanco entre subtítulos
+        buf.write(
+            f"{i}\n"
+            f"{format_srt_timestamp(seg['start'])} --> {format_srt_timestamp(seg['end'])}\n"
+            f"[{seg['speaker']}]: {seg['text'].strip()}\n"
+        )
     
-    return "\n".join(srt_lines)
+    return buf.getvalue()
 
 
 def format_timestamp(seconds: float) -> str:
@@ -284,11 +422,7 @@ def format_timestamp(seconds: float) -> str:
     Returns:
         Timestamp formateado
     """
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
-    
-    return f"{hours:02d}:{minutes:02d}:{secs:02d}"
+    return _format_hms(int(seconds))
 
 
 def format_srt_timestamp(seconds: float) -> str:
@@ -301,11 +435,25 @@ def format_srt_timestamp(seconds: float) -> str:
     Returns:
         Timestamp SRT formateado
     """
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
-    millis = int((seconds % 1) * 1000)
-    
+    return _format_srt_ms(round(seconds * 1000))
+
+
+# Los tiempos se cuantizan a enteros (segundos / milisegundos) antes de
+# formatear: aritmética entera y caché para los límites que se repiten
+# (el fin de un segmento suele ser el inicio del siguiente). Los milisegundos
+# se redondean: truncar la parte decimal convertía 1.025 en ",024"
+@lru_cache(maxsize=4096)
+def _format_hms(total_secs: int) -> str:
+    minutes, secs = divmod(total_secs, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}"
+
+
+@lru_cache(maxsize=8192)
+def _format_srt_ms(total_ms: int) -> str:
+    secs, millis = divmod(total_ms, 1000)
+    minutes, secs = divmod(secs, 60)
+    hours, minutes = divmod(minutes, 60)
     return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
 
 
@@ -319,39 +467,40 @@ def get_speaker_statistics(aligned_segments: List[Dict]) -> Dict:
     Returns:
         Estadísticas por hablante
     """
-    stats = {}
+    stats = defaultdict(lambda: {
+        "total_time": 0.0,
+        "total_words": 0,
+        "segment_count": 0
+    })
+    total_time = 0.0
+    total_words = 0
     
     for seg in aligned_segments:
-        speaker = seg["speaker"]
         duration = seg["duration"]
-        word_count = len(seg["text"].split())
-        
-        if speaker not in stats:
-            stats[speaker] = {
-                "total_time": 0.0,
-                "total_words": 0,
-                "segment_count": 0
-            }
+        # Conteo precalculado por transcribe_with_timestamps; si falta, se calcula aquí
+        word_count = seg.get("word_count")
+        if word_count is None:
+            word_count = len(seg["text"].split())
         
-        stats[speaker]["total_time"] += duration
-        stats[speaker]["total_words"] += word_count
-        stats[speaker]["segment_count"] += 1
+        speaker_stats = stats[seg["speaker"]]
+        speaker_stats["total_time"] += duration
+        speaker_stats["total_words"] += word_count
+        speaker_stats["segment_count"] += 1
+        total_time += duration
+        total_words += word_count
     
     # Calcular porcentajes
-    total_time = sum(s["total_time"] for s in stats.values())
-    total_words = sum(s["total_words"] for s in stats.values())
-    
-    for speaker in stats:
-        stats[speaker]["time_percentage"] = (
-            stats[speaker]["total_time"] / total_time * 100 
+    for speaker_stats in stats.values():
+        speaker_stats["time_percentage"] = (
+            speaker_stats["total_time"] / total_time * 100 
             if total_time > 0 else 0
         )
-        stats[speaker]["word_percentage"] = (
-            stats[speaker]["total_words"] / total_words * 100 
+        speaker_stats["word_percentage"] = (
+            speaker_stats["total_words"] / total_words * 100 
             if total_words > 0 else 0
         )
     
-    return stats
+    return dict(stats)
 
 
 # Ejemplo de uso
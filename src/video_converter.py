@@ -2,13 +2,47 @@
 Módulo para convertir videos a audio MP3
 """
 import os
+import re
+import shutil
 import subprocess
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Clave de tiempo en la salida de `-progress` (en microsegundos pese al nombre)
+_OUT_TIME_RE = re.compile(rb'^out_time_ms=(\d+)$', re.MULTILINE)
+# Intervalo mínimo entre dos llamadas al callback de progreso (segundos)
+PROGRESS_MIN_INTERVAL = 0.25
+# Resultados de ffprobe que se conservan por convertidor (LRU): el de main.py vive
+# todo el proceso y cada subida añade una entrada
+INFO_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=1)
+def ffmpeg_available() -> bool:
+    """
+    Indica si `ffmpeg -version` funciona. Se consulta una sola vez por
+    proceso: la instalación de FFmpeg no cambia mientras corre el servicio.
+    """
+    try:
+        result = subprocess.run(
+            ['ffmpeg', '-version'],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=5
+        )
+        return result.returncode == 0
+    except (subprocess.TimeoutExpired, FileNotFoundError):
+        return False
+
 
 class VideoConverter:
     """
@@ -32,24 +66,19 @@ class VideoConverter:
         # Verificar que FFmpeg esté instalado
         if not self.check_ffmpeg():
             logger.warning("FFmpeg no está instalado o no está en el PATH")
+        
+        # Resultados de ffprobe: (ruta, mtime, tamaño) -> info, los más recientes
+        self._info_cache = OrderedDict()
+        self._info_lock = threading.Lock()
     
     def check_ffmpeg(self) -> bool:
         """
-        Verifica si FFmpeg está instalado.
+        Verifica si FFmpeg está instalado (resultado cacheado por proceso).
         
         Returns:
             True si FFmpeg está disponible, False si no
         """
-        try:
-            result = subprocess.run(
-                ['ffmpeg', '-version'],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                timeout=5
-            )
-            return result.returncode == 0
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            return False
+        return ffmpeg_available()
     
     def convert_video_to_mp3(
         self,
@@ -103,15 +132,30 @@ class VideoConverter:
         logger.info(f"Convirtiendo video a MP3: {video_path} -> {output_path}")
         
         try:
-            # Comando FFmpeg para extraer audio
-            command = [
-                'ffmpeg',
-                '-i', video_path,           # Input file
-                '-vn',                       # Sin video
-                '-acodec', 'libmp3lame',    # Codec MP3
-                '-b:a', bitrate,            # Bitrate
-                '-ar', str(sample_rate),    # Sample rate
-            ]
+            if not max_duration and self._can_copy_audio(video_info, sample_rate):
+                # El audio ya es MP3 a la frecuencia pedida: copiar el stream
+                # sin decodificar ni recodificar (conserva su bitrate original)
+                logger.info("El audio ya es MP3, se copia sin recodificar")
+                command = [
+                    'ffmpeg',
+                    '-loglevel', 'error',
+                    '-i', video_path,
+                    '-map', '0:a:0',
+                    '-vn',
+                    '-c:a', 'copy',
+                ]
+            else:
+                # Comando FFmpeg para extraer audio
+                command = [
+                    'ffmpeg',
+                    '-loglevel', 'error',
+                    '-i', video_path,           # Input file
+                    '-vn',                       # Sin video
+                    '-acodec', 'libmp3lame',    # Codec MP3
+                    '-b:a', bitrate,            # Bitrate
+                    '-ar', str(sample_rate),    # Sample rate
+                    '-threads', '0',            # Hilos automáticos
+                ]
             
             # Limitar duración si se especifica
             if max_duration:
@@ -125,7 +169,7 @@ class VideoConverter:
             # Ejecutar FFmpeg
             result = subprocess.run(
                 command,
-                stdout=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
                 stderr=subprocess.PIPE,
                 timeout=timeout
             )
@@ -143,10 +187,22 @@ class VideoConverter:
             logger.error(f"Error durante la conversión: {e}")
             raise
     
+    @staticmethod
+    def _can_copy_audio(video_info: dict, sample_rate: int) -> bool:
+        """Indica si la primera pista de audio puede copiarse tal cual a MP3."""
+        return (
+            video_info.get('audio_codec') == 'mp3'
+            and video_info.get('sample_rate') == sample_rate
+        )
+    
     def get_video_info(self, video_path: str) -> dict:
         """
         Obtiene información del video usando FFprobe.
         
+        Primero lee solo las cabeceras del contenedor (sin analizar frames); si
+        falta la duración o el audio, repite con el análisis completo. El
+        resultado se cachea por (ruta, mtime, tamaño), hasta INFO_CACHE_SIZE entradas.
+        
         Args:
             video_path: Ruta al archivo de video
         
@@ -156,50 +212,77 @@ class VideoConverter:
         if not os.path.exists(video_path):
             raise FileNotFoundError(f"Video no encontrado: {video_path}")
         
+        stat = os.stat(video_path)
+        cache_key = (video_path, stat.st_mtime_ns, stat.st_size)
+        with self._info_lock:
+            cached = self._info_cache.get(cache_key)
+            if cached is not None:
+                self._info_cache.move_to_end(cache_key)
+                return dict(cached)
+        
         try:
-            command = [
-                'ffprobe',
-                '-v', 'quiet',
-                '-print_format', 'json',
-                '-show_format',
-                '-show_streams',
-                video_path
-            ]
-            
-            result = subprocess.run(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                timeout=30
-            )
-            
-            if result.returncode == 0:
-                import json
-                info = json.loads(result.stdout.decode('utf-8'))
-                
-                # Extraer información relevante
-                format_info = info.get('format', {})
-                audio_stream = None
-                
-                for stream in info.get('streams', []):
-                    if stream.get('codec_type') == 'audio':
-                        audio_stream = stream
-                        break
-                
-                return {
-                    'duration': float(format_info.get('duration', 0)),
-                    'size': int(format_info.get('size', 0)),
-                    'format': format_info.get('format_name', 'unknown'),
-                    'has_audio': audio_stream is not None,
-                    'audio_codec': audio_stream.get('codec_name') if audio_stream else None,
-                    'sample_rate': int(audio_stream.get('sample_rate', 0)) if audio_stream else 0
-                }
-            else:
-                return {}
-                
+            info = self._probe(video_path, fast=True)
+            if not info or not info['duration'] or not info['sample_rate']:
+                # Contenedores sin metadatos en cabecera (p. ej. MPEG-TS): análisis completo
+                full_info = self._probe(video_path, fast=False)
+                if full_info:
+                    info = full_info
         except Exception as e:
             logger.error(f"Error al obtener información del video: {e}")
             return {}
+        
+        if info:
+            with self._info_lock:
+                self._info_cache[cache_key] = info
+                while len(self._info_cache) > INFO_CACHE_SIZE:
+                    self._info_cache.popitem(last=False)
+        return dict(info)
+    
+    def _probe(self, video_path: str, fast: bool) -> dict:
+        """Ejecuta ffprobe y extrae la información relevante ({} si falla)."""
+        command = ['ffprobe', '-v', 'quiet']
+        if fast:
+            # Solo cabeceras: no decodificar frames para confirmar parámetros
+            command.extend(['-probesize', '32', '-analyzeduration', '0'])
+        command.extend([
+            '-print_format', 'json',
+            # Solo los campos que se usan abajo: con muchas pistas la salida
+            # completa de -show_format/-show_streams ocupa megas de JSON
+            '-show_entries',
+            'format=duration,size,format_name:stream=codec_type,codec_name,sample_rate',
+            video_path
+        ])
+        
+        result = subprocess.run(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            timeout=30
+        )
+        
+        if result.returncode != 0:
+            return {}
+        
+        import json
+        info = json.loads(result.stdout.decode('utf-8'))
+        
+        # Extraer información relevante
+        format_info = info.get('format', {})
+        audio_stream = None
+        
+        for stream in info.get('streams', []):
+            if stream.get('codec_type') == 'audio':
+                audio_stream = stream
+                break
+        
+        return {
+            'duration': float(format_info.get('duration', 0)),
+            'size': int(format_info.get('size', 0)),
+            'format': format_info.get('format_name', 'unknown'),
+            'has_audio': audio_stream is not None,
+            'audio_codec': audio_stream.get('codec_name') if audio_stream else None,
+            'sample_rate': int(audio_stream.get('sample_rate', 0)) if audio_stream else 0
+        }
     
     def convert_long_video_to_mp3(
         self,
@@ -233,6 +316,11 @@ class VideoConverter:
             logger.warning("No se pudo determinar la duración del video, usando método estándar")
             return self.convert_video_to_mp3(video_path, output_filename, bitrate, sample_rate)
         
+        if self._can_copy_audio(video_info, sample_rate):
+            # Copiar el stream es una sola pasada sin codificar: no hay
+            # nada que repartir en chunks
+            return self.convert_video_to_mp3(video_path, output_filename, bitrate, sample_rate)
+        
         logger.info(f"Video largo detectado: {total_duration/60:.1f} minutos")
         logger.info(f"Procesando en chunks de {chunk_duration/60:.1f} minutos")
         
@@ -242,56 +330,44 @@ class VideoConverter:
             output_filename = f"{video_name}.mp3"
         
         output_path = os.path.join(self.output_dir, output_filename)
-        temp_chunks = []
+        chunk_dir = None
         
         try:
             # Dividir en chunks
             num_chunks = int(total_duration / chunk_duration) + 1
-            
-            for i in range(num_chunks):
-                start_time = i * chunk_duration
-                
+            chunk_starts = [
+                i * chunk_duration
+                for i in range(num_chunks)
                 # No procesar más allá de la duración total
-                if start_time >= total_duration:
-                    break
-                
-                chunk_filename = f"chunk_{i}_{output_filename}"
-                chunk_path = os.path.join(self.output_dir, chunk_filename)
-                temp_chunks.append(chunk_path)
-                
-                logger.info(f"Procesando chunk {i+1}/{num_chunks} (desde {start_time}s)")
-                
-                command = [
-                    'ffmpeg',
-                    '-ss', str(start_time),      # Inicio
-                    '-t', str(chunk_duration),   # Duración
-                    '-i', video_path,
-                    '-vn',
-                    '-acodec', 'libmp3lame',
-                    '-b:a', bitrate,
-                    '-ar', str(sample_rate),
-                    '-y',
-                    chunk_path
-                ]
-                
-                result = subprocess.run(
-                    command,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    timeout=chunk_duration * 2 + 60  # Timeout dinámico
+                if i * chunk_duration < total_duration
+            ]
+            
+            cpu_count = os.cpu_count() or 1
+            max_workers = max(1, min(len(chunk_starts), cpu_count))
+            
+            if max_workers == 1:
+                # Sin paralelismo posible: una sola pasada con el muxer de segmentos
+                # (un único proceso, sin re-abrir ni buscar en el video por cada chunk).
+                # Directorio propio por invocación: dos conversiones simultáneas
+                # en el mismo output_dir no comparten nombres de chunk
+                chunk_dir = tempfile.mkdtemp(prefix='chunks_', dir=self.output_dir)
+                temp_chunks = self._encode_segmented(
+                    video_path, chunk_dir, bitrate, sample_rate,
+                    chunk_duration, total_duration
                 )
                 
-                if result.returncode != 0:
-                    error_msg = result.stderr.decode('utf-8', errors='ignore')
-                    raise RuntimeError(f"Error en chunk {i}: {error_msg}")
-            
-            # Concatenar chunks si hay más de uno
-            if len(temp_chunks) > 1:
-                logger.info(f"Concatenando {len(temp_chunks)} chunks...")
-                self._concatenate_audio_files(temp_chunks, output_path)
-            elif len(temp_chunks) == 1:
-                # Solo un chunk, renombrar
-                os.rename(temp_chunks[0], output_path)
+                # Concatenar chunks si hay más de uno
+                if len(temp_chunks) > 1:
+                    logger.info(f"Concatenando {len(temp_chunks)} chunks...")
+                    self._concatenate_audio_files(temp_chunks, output_path)
+                elif len(temp_chunks) == 1:
+                    # Solo un chunk, renombrar
+                    os.rename(temp_chunks[0], output_path)
+            else:
+                self._encode_chunks_parallel(
+                    video_path, output_path, chunk_starts, chunk_duration,
+                    bitrate, sample_rate, max_workers, cpu_count
+                )
             
             logger.info(f"Video largo convertido exitosamente: {output_path}")
             return output_path
@@ -302,60 +378,161 @@ class VideoConverter:
         
         finally:
             # Limpiar chunks temporales
-            for chunk in temp_chunks:
-                if os.path.exists(chunk) and chunk != output_path:
+            if chunk_dir is not None:
+                shutil.rmtree(chunk_dir, ignore_errors=True)
+    
+    def _encode_chunks_parallel(
+        self,
+        video_path: str,
+        output_path: str,
+        chunk_starts: list,
+        chunk_duration: int,
+        bitrate: str,
+        sample_rate: int,
+        max_workers: int,
+        cpu_count: int
+    ):
+        """
+        Codifica los chunks en paralelo y escribe sus frames MP3, en orden,
+        directamente en `output_path`: sin archivos intermedios ni segunda
+        pasada de FFmpeg para concatenar.
+        """
+        # Los chunks son independientes: codificarlos en paralelo. Cada FFmpeg
+        # recibe una parte de los núcleos para no sobresuscribir la CPU
+        threads_per_chunk = max(1, cpu_count // max_workers)
+        
+        logger.info(f"Codificando {len(chunk_starts)} chunks con {max_workers} procesos FFmpeg en paralelo")
+        
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor, open(output_path, 'wb') as out:
+                futures = [
+                    executor.submit(
+                        _encode_chunk,
+                        video_path,
+                        start_time,
+                        chunk_duration,
+                        bitrate,
+                        sample_rate,
+                        threads_per_chunk
+                    )
+                    for start_time in chunk_starts
+                ]
+                # result() en orden: cada chunk se escribe en cuanto están los anteriores
+                for i, future in enumerate(futures):
                     try:
-                        os.remove(chunk)
+                        out.write(future.result())
                     except Exception as e:
-                        logger.warning(f"No se pudo eliminar chunk temporal {chunk}: {e}")
+                        # No arrancar los chunks pendientes: el resultado ya es inválido
+                        # (los ya escritos quedaron en None)
+                        for pending in futures[i + 1:]:
+                            pending.cancel()
+                        raise RuntimeError(f"Error en chunk {i}: {e}") from e
+                    futures[i] = None  # Liberar los bytes ya escritos
+        except Exception:
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            raise
+    
+    def _encode_segmented(
+        self,
+        video_path: str,
+        chunk_dir: str,
+        bitrate: str,
+        sample_rate: int,
+        chunk_duration: int,
+        total_duration: float
+    ) -> list:
+        """
+        Codifica el video completo en una sola pasada y lo corta en chunks de
+        `chunk_duration` segundos con el muxer `segment` de FFmpeg.
+        
+        Args:
+            chunk_dir: Directorio temporal exclusivo de esta conversión; quien
+                llama se encarga de borrarlo
+        
+        Returns:
+            Lista ordenada de rutas a los chunks generados
+        """
+        pattern = os.path.join(chunk_dir, "chunk_%03d.mp3")
+        command = [
+            'ffmpeg',
+            '-loglevel', 'error',
+            '-i', video_path,
+            '-vn',
+            '-acodec', 'libmp3lame',
+            '-b:a', bitrate,
+            '-ar', str(sample_rate),
+            '-threads', '0',
+            '-f', 'segment',
+            '-segment_time', str(chunk_duration),
+            '-reset_timestamps', '1',
+            '-y',
+            pattern
+        ]
+        
+        logger.info(f"Codificando en una sola pasada con segmentos de {chunk_duration}s")
+        
+        result = subprocess.run(
+            command,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            timeout=total_duration * 2 + 60  # Timeout dinámico
+        )
+        if result.returncode != 0:
+            error_msg = result.stderr.decode('utf-8', errors='ignore')
+            raise RuntimeError(f"Error al segmentar video: {error_msg}")
+        
+        # Los nombres con índice de 3 dígitos ordenan igual que los segmentos
+        return [
+            os.path.join(chunk_dir, name)
+            for name in sorted(os.listdir(chunk_dir))
+        ]
     
     def _concatenate_audio_files(self, input_files: list, output_path: str):
         """
         Concatena múltiples archivos de audio en uno solo.
         
+        La lista para el demuxer concat se pasa por stdin: no hay archivo de
+        lista en disco que limpiar ni que compartan dos conversiones simultáneas.
+        
         Args:
             input_files: Lista de rutas a archivos de audio
             output_path: Ruta del archivo de salida
         """
-        # Crear archivo de lista para FFmpeg
-        list_file = os.path.join(self.output_dir, "concat_list.txt")
-        
-        try:
-            with open(list_file, 'w', encoding='utf-8') as f:
-                for file_path in input_files:
-                    # FFmpeg necesita rutas con formato específico
-                    escaped_path = file_path.replace('\\', '/').replace("'", "'\\''")
-                    f.write(f"file '{escaped_path}'\n")
-            
-            # Concatenar usando FFmpeg
-            command = [
-                'ffmpeg',
-                '-f', 'concat',
-                '-safe', '0',
-                '-i', list_file,
-                '-c', 'copy',
-                '-y',
-                output_path
-            ]
-            
-            result = subprocess.run(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                timeout=300
+        # FFmpeg necesita rutas con formato específico; se dan como URL file:
+        # absolutas porque, leída desde stdin, la lista resolvería las rutas
+        # contra "pipe:"
+        list_text = ''.join(
+            "file 'file:{}'\n".format(
+                os.path.abspath(file_path).replace('\\', '/').replace("'", "'\\''")
             )
-            
-            if result.returncode != 0:
-                error_msg = result.stderr.decode('utf-8', errors='ignore')
-                raise RuntimeError(f"Error al concatenar archivos: {error_msg}")
-            
-        finally:
-            # Limpiar archivo de lista
-            if os.path.exists(list_file):
-                try:
-                    os.remove(list_file)
-                except Exception as e:
-                    logger.warning(f"No se pudo eliminar archivo de lista: {e}")
+            for file_path in input_files
+        )
+        
+        # Concatenar usando FFmpeg
+        command = [
+            'ffmpeg',
+            '-loglevel', 'error',
+            '-f', 'concat',
+            '-safe', '0',
+            '-protocol_whitelist', 'file,pipe',
+            '-i', 'pipe:0',
+            '-c', 'copy',
+            '-y',
+            output_path
+        ]
+        
+        result = subprocess.run(
+            command,
+            input=list_text.encode('utf-8'),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            timeout=300
+        )
+        
+        if result.returncode != 0:
+            error_msg = result.stderr.decode('utf-8', errors='ignore')
+            raise RuntimeError(f"Error al concatenar archivos: {error_msg}")
     
     def convert_with_progress(
         self,
@@ -369,7 +546,9 @@ class VideoConverter:
         Args:
             video_path: Ruta al archivo de video
             output_filename: Nombre del archivo de salida
-            progress_callback: Función para reportar progreso (recibe porcentaje)
+            progress_callback: Función para reportar progreso (recibe porcentaje
+                entero 0-100; solo cuando cambia y como mucho cada
+                PROGRESS_MIN_INTERVAL segundos, más el 100 final)
         
         Returns:
             Ruta al archivo MP3 generado
@@ -391,7 +570,10 @@ class VideoConverter:
             '-acodec', 'libmp3lame',
             '-b:a', '192k',
             '-ar', '44100',
+            '-threads', '0',
             '-progress', 'pipe:1',  # Reportar progreso a stdout
+            '-nostats',
+            '-loglevel', 'error',
             '-y',
             output_path
         ]
@@ -400,24 +582,55 @@ class VideoConverter:
             process = subprocess.Popen(
                 command,
                 stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True
+                stderr=subprocess.PIPE
             )
             
-            # Leer progreso
-            for line in process.stdout:
-                if line.startswith('out_time_ms='):
-                    time_ms = int(line.split('=')[1])
-                    time_sec = time_ms / 1000000
-                    
-                    if duration > 0 and progress_callback:
-                        progress = min(100, (time_sec / duration) * 100)
-                        progress_callback(progress)
+            # Vaciar stderr en paralelo: si se llenara su pipe, FFmpeg se
+            # bloquearía y dejaría de emitir progreso por stdout
+            stderr_chunks = []
+            stderr_thread = threading.Thread(
+                target=lambda: stderr_chunks.append(process.stderr.read()),
+                daemon=True
+            )
+            stderr_thread.start()
+            
+            # Leer progreso por bloques; de cada bloque solo interesa el
+            # último out_time_ms completo
+            pending = b''
+            duration_us = int(duration * 1000000)
+            last_pct = -1
+            last_emit = 0.0
+            while True:
+                data = process.stdout.read1(65536)
+                if not data:
+                    break
+                pending += data
+                cut = pending.rfind(b'\n') + 1
+                block, pending = pending[:cut], pending[cut:]
+                
+                if duration_us > 0 and progress_callback:
+                    time_us = None
+                    for match in _OUT_TIME_RE.finditer(block):
+                        time_us = match.group(1)
+                    if time_us is None:
+                        continue
+                    pct = min(100, int(time_us) * 100 // duration_us)
+                    now = time.monotonic()
+                    if pct != last_pct and now - last_emit >= PROGRESS_MIN_INTERVAL:
+                        progress_callback(pct)
+                        last_pct = pct
+                        last_emit = now
             
             process.wait()
+            stderr_thread.join()
             
             if process.returncode != 0:
-                raise RuntimeError("Error en la conversión")
+                error_msg = b''.join(stderr_chunks).decode('utf-8', errors='ignore')
+                raise RuntimeError(f"Error en la conversión: {error_msg}")
+            
+            # El último evento puede haberse descartado por el intervalo mínimo
+            if duration_us > 0 and progress_callback and last_pct != 100:
+                progress_callback(100)
             
             return output_path
             
@@ -426,6 +639,72 @@ class VideoConverter:
             raise
 
 
+def _encode_chunk(
+    video_path: str,
+    start_time: float,
+    duration: float,
+    bitrate: str,
+    sample_rate: int,
+    threads: int = 0
+) -> bytes:
+    """
+    Extrae y codifica a MP3 un segmento [start_time, start_time + duration) del video.
+    
+    Los frames MP3 salen por stdout sin cabeceras (ni ID3 ni Xing), de modo
+    que los segmentos se pueden escribir uno detrás de otro en el archivo final.
+    
+    Args:
+        video_path: Ruta al archivo de video
+        start_time: Inicio del segmento en segundos
+        duration: Duración del segmento en segundos
+        bitrate: Bitrate del audio
+        sample_rate: Frecuencia de muestreo
+        threads: Hilos de FFmpeg para este segmento (0 = automático)
+    
+    Returns:
+        Frames MP3 del segmento
+    """
+    # -ss antes de -i: búsqueda en la entrada, que salta directamente al punto.
+    # No se usa -noaccurate_seek: con -vn solo se decodifica audio, donde la
+    # búsqueda exacta descarta como mucho un paquete, y sin ella cada segmento
+    # empezaría algo antes y se solaparía con el final del anterior
+    command = [
+        'ffmpeg',
+        '-loglevel', 'error',
+        '-ss', str(start_time),      # Inicio
+        '-t', str(duration),         # Duración
+        '-i', video_path,
+        '-vn',
+        '-acodec', 'libmp3lame',
+        '-b:a', bitrate,
+        '-ar', str(sample_rate),
+        '-threads', str(threads),
+        '-write_xing', '0',          # La cabecera Xing solo describiría este segmento
+        '-id3v2_version', '0',
+        '-f', 'mp3',
+        'pipe:1'
+    ]
+    
+    result = subprocess.run(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        timeout=duration * 2 + 60  # Timeout dinámico
+    )
+    
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode('utf-8', errors='ignore'))
+    return result.stdout
+
+
+# Extensiones de video soportadas (frozenset: búsqueda O(1) en is_video_file)
+_VIDEO_FORMATS = (
+    'mp4', 'avi', 'mov', 'mkv', 'flv', 'wmv', 'webm',
+    'm4v', 'mpg', 'mpeg', '3gp', 'ogv'
+)
+_VIDEO_EXTS = frozenset(_VIDEO_FORMATS)
+
+
 def get_supported_video_formats() -> list:
     """
     Retorna la lista de formatos de video soportados.
@@ -433,10 +712,7 @@ def get_supported_video_formats() -> list:
     Returns:
         Lista de extensiones de video soportadas
     """
-    return [
-        'mp4', 'avi', 'mov', 'mkv', 'flv', 'wmv', 'webm',
-        'm4v', 'mpg', 'mpeg', '3gp', 'ogv'
-    ]
+    return list(_VIDEO_FORMATS)
 
 
 def is_video_file(filename: str) -> bool:
@@ -449,8 +725,9 @@ def is_video_file(filename: str) -> bool:
     Returns:
         True si es un video soportado, False si no
     """
-    extension = Path(filename).suffix.lower().lstrip('.')
-    return extension in get_supported_video_formats()
+    _, dot, extension = filename.rpartition('.')
+    # Sin punto no hay extensión (igual que Path.suffix)
+    return bool(dot) and extension.lower() in _VIDEO_EXTS
 
 
 # Ejemplo de uso
@@ -6,15 +6,31 @@ Worker simple para procesar jobs en segundo plano.
 
 Este worker está pensado para correr como proceso separado (systemd, tmux, docker service, o App Platform worker service).
 """
+import io
 import os
+import select
 import time
 import json
 import logging
+import shutil
+import socket
+import subprocess
+import http.client
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from pathlib import Path
 from datetime import datetime
 import threading
 import concurrent.futures
+import multiprocessing
+from collections import OrderedDict
+
+# orjson (opcional) serializa los resultados en código nativo; si falta se usa json
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 UPLOAD_DIR = os.getenv('UPLOAD_DIR', str(PROJECT_ROOT / 'uploads'))
@@ -29,9 +45,11 @@ if ensure_upload_dirs:
     paths = ensure_upload_dirs(UPLOAD_DIR)
     JOBS_DIR = paths.get('jobs_dir')
     FAILED_DIR = paths.get('failed_dir')
+    RESULTS_DIR = paths.get('results_dir')
 else:
     JOBS_DIR = os.path.join(UPLOAD_DIR, 'jobs')
     FAILED_DIR = os.path.join(JOBS_DIR, 'failed')
+    RESULTS_DIR = os.path.join(UPLOAD_DIR, 'results')
 
 # Asegurarse de que el path src esté en sys.path si se ejecuta desde el repo raíz
 import sys
@@ -39,14 +57,14 @@ sys.path.insert(0, str(PROJECT_ROOT))
 
 # Preferir imports relativos cuando se ejecuta como paquete `src`
 try:
-    from .transcriber import AudioTranscriber
+    from .transcriber import AudioTranscriber, resolve_backend
     from .diarizer import SpeakerDiarizer
-    from .utils import align_transcription_with_diarization, format_transcript, get_speaker_statistics, renumber_speakers
+    from .utils import align_transcription_with_diarization, atomic_write_bytes, format_transcript, get_speaker_statistics, renumber_speakers
 except Exception:
     # Fallback a imports absolutos (útil cuando se ejecuta el script directamente)
-    from src.transcriber import AudioTranscriber
+    from src.transcriber import AudioTranscriber, resolve_backend
     from src.diarizer import SpeakerDiarizer
-    from src.utils import align_transcription_with_diarization, format_transcript, get_speaker_statistics, renumber_speakers
+    from src.utils import align_transcription_with_diarization, atomic_write_bytes, format_transcript, get_speaker_statistics, renumber_speakers
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('worker')
@@ -68,27 +86,459 @@ POLL_INTERVAL = int(os.getenv('WORKER_POLL_INTERVAL', '5'))
 MAX_ATTEMPTS = int(os.getenv('WORKER_MAX_ATTEMPTS', '3'))
 # Número de workers concurrentes para procesar jobs (1 = secuencial)
 WORKER_MAX_WORKERS = int(os.getenv('WORKER_MAX_WORKERS', '1'))
+# Con WORKER_MAX_WORKERS > 1 se empieza con un worker activo y se sube de golpe a
+# tantos como jobs haya (pendientes más en curso, hasta WORKER_MAX_WORKERS); tras
+# estos segundos sin jobs se vuelve a uno (0 = usar siempre WORKER_MAX_WORKERS)
+WORKER_SCALE_IDLE_SECONDS = int(os.getenv('WORKER_SCALE_IDLE_SECONDS', '60'))
+# Claims de otro host (volumen compartido, o este mismo contenedor recreado: el
+# hostname es su ID) sin cambios desde hace más de estos segundos se devuelven a
+# la cola al arrancar. Debe superar lo que tarda el job más largo, o un host vivo
+# podría estar procesándolo aún (0 = no tocarlos, solo avisar)
+WORKER_FOREIGN_CLAIM_TIMEOUT = int(os.getenv('WORKER_FOREIGN_CLAIM_TIMEOUT', '0'))
+# Jobs extra que se toman y descargan mientras los workers están ocupados (0 = sin prefetch)
+WORKER_PREFETCH_JOBS = int(os.getenv('WORKER_PREFETCH_JOBS', '1'))
+# Jobs de solo transcripción con el mismo modelo que se procesan juntos (1 = sin lotes)
+WORKER_BATCH_SIZE = int(os.getenv('WORKER_BATCH_SIZE', '1'))
+# Opcional: decodificar la descarga al vuelo con FFmpeg (sin pasar por disco).
+# Las fuentes MP4/MOV se descargan siempre completas (ver _needs_seekable_input)
+WORKER_STREAM_DECODE = os.getenv('WORKER_STREAM_DECODE', '0').lower() in ('1', 'true', 'yes')
+# Whisper trabaja con audio mono a 16 kHz
+STREAM_SAMPLE_RATE = 16000
+# Tamaño de bloque al copiar descargas (bytes)
+DOWNLOAD_CHUNK_SIZE = int(os.getenv('WORKER_DOWNLOAD_CHUNK_SIZE', str(1024 * 1024)))
+# Timeout de conexión y de lectura de las descargas (segundos)
+DOWNLOAD_TIMEOUT = 60
+# Descargas HTTP sin TLS copiadas dentro del kernel con os.splice (experimental)
+WORKER_SPLICE_DOWNLOADS = os.getenv('WORKER_SPLICE_DOWNLOADS', '0').lower() in ('1', 'true', 'yes')
+# Fuentes de hasta este tamaño se descargan y decodifican en memoria en vez de
+# escribirse a disco (bytes, 0 = desactivado)
+WORKER_MEMORY_DOWNLOAD_MAX = int(os.getenv('WORKER_MEMORY_DOWNLOAD_MAX', str(50 * 1024 * 1024)))
+
+# Modelos Whisper a mantener cargados a la vez (por proceso)
+WORKER_MODEL_CACHE_SIZE = int(os.getenv('WORKER_MODEL_CACHE_SIZE', '3'))
+# Progreso de un job: solo se notifica si avanza al menos PROGRESS_MIN_STEP puntos
+# o si pasaron PROGRESS_MIN_INTERVAL segundos desde la última notificación
+PROGRESS_MIN_STEP = 5
+PROGRESS_MIN_INTERVAL = 1.0
+# Backend y precisión de Whisper, las mismas variables que usa main.py. Con "auto"
+# se usa faster-whisper (CTranslate2) si está instalado, en FP32 en CPU (int8 solo
+# con WHISPER_PRECISION=int8) e int8_float16/fp16 en GPU
+WHISPER_BACKEND = os.getenv('WHISPER_BACKEND', 'auto')
+WHISPER_PRECISION = os.getenv('WHISPER_PRECISION', 'auto')
+# Cargar los modelos al arrancar el worker en vez de en el primer job
+WORKER_PRELOAD_WHISPER = os.getenv('WORKER_PRELOAD_WHISPER', '0').lower() in ('1', 'true', 'yes')
+WORKER_PRELOAD_DIARIZER = os.getenv('WORKER_PRELOAD_DIARIZER', '0').lower() in ('1', 'true', 'yes')
 
-# Singletons para reutilizar cargas de modelos pesados
-_transcriber_singleton = None
+# Caché LRU de transcriptores por modelo y singleton del diarizador, para
+# reutilizar cargas de modelos pesados entre jobs. _singleton_lock solo protege
+# las operaciones sobre la caché; las cargas se serializan por modelo para que
+# un job con un modelo ya cargado no espere a la carga de otro
+_transcriber_cache = OrderedDict()
+_transcriber_load_locks = {}
 _diarizer_singleton = None
 _singleton_lock = threading.Lock()
+_diarizer_lock = threading.Lock()
+
+
+# Sesión HTTP por proceso: reutiliza conexiones (TCP/TLS) entre descargas al
+# mismo host. Se crea por pid para que un proceso hijo no comparta sockets del padre
+_http_session = None
+_http_session_pid = None
+_http_lock = threading.Lock()
+
+
+def _get_http_session() -> requests.Session:
+    global _http_session, _http_session_pid
+    with _http_lock:
+        if _http_session is None or _http_session_pid != os.getpid():
+            session = requests.Session()
+            # Reintentos ante errores de conexión y 502/503/504 transitorios; el resto
+            # de errores HTTP llegan a raise_for_status como antes
+            retry = Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=[502, 503, 504],
+                raise_on_status=False
+            )
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retry)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _http_session = session
+            _http_session_pid = os.getpid()
+        return _http_session
+
+
+def _splice_response_to_file(resp, f) -> bool:
+    """Copia el cuerpo de `resp` a `f` dentro del kernel (socket -> pipe -> archivo).
+
+    Con os.splice los bytes no pasan por espacio de usuario, lo que se nota en
+    descargas de varios GB. Es opcional (WORKER_SPLICE_DOWNLOADS) porque depende
+    de cómo urllib3 envuelve la respuesta de http.client. Solo aplica a HTTP sin
+    TLS, sin Content-Encoding ni chunked, con Content-Length conocido y sin nada
+    leído aún por urllib3; en otro caso devuelve False sin haber consumido nada
+    y el llamador copia con shutil.
+    """
+    if not hasattr(os, 'splice') or not resp.url.startswith('http://'):
+        return False  # Con TLS el kernel solo ve bytes cifrados
+    headers = resp.headers
+    if headers.get('Content-Encoding', 'identity') != 'identity' or 'Transfer-Encoding' in headers:
+        return False
+    try:
+        remaining = int(headers['Content-Length'])
+        # Internos de urllib3: la respuesta de http.client y su BufferedReader sobre el socket
+        fp = resp.raw._fp.fp
+        if not isinstance(resp.raw._fp, http.client.HTTPResponse) or not isinstance(fp, io.BufferedReader):
+            return False
+        if resp.raw.tell() != 0:
+            return False
+        sock_fd = fp.fileno()
+    except (KeyError, ValueError, AttributeError, TypeError, OSError):
+        return False
+
+    # http.client puede haber leído ya parte del cuerpo junto con las cabeceras
+    if remaining:
+        buffered = fp.read(min(len(fp.peek()), remaining))
+        f.write(buffered)
+        remaining -= len(buffered)
+    f.flush()
+
+    out_fd = f.fileno()
+    r, w = os.pipe()
+    try:
+        try:
+            import fcntl
+            fcntl.fcntl(w, fcntl.F_SETPIPE_SZ, DOWNLOAD_CHUNK_SIZE)
+        except (ImportError, AttributeError, OSError):
+            pass  # Se queda con el tamaño de pipe por defecto (64 KiB)
+        while remaining:
+            try:
+                n = os.splice(sock_fd, w, min(remaining, DOWNLOAD_CHUNK_SIZE))
+            except BlockingIOError:
+                # Un socket con timeout es no bloqueante a nivel de fd: esperar datos
+                if not select.select([sock_fd], [], [], DOWNLOAD_TIMEOUT)[0]:
+                    raise requests.exceptions.ReadTimeout(f"Timeout leyendo {resp.url}")
+                continue
+            if n == 0:
+                raise requests.exceptions.ConnectionError(
+                    f"Conexión cerrada con {remaining} bytes pendientes: {resp.url}"
+                )
+            remaining -= n
+            while n:
+                n -= os.splice(r, out_fd, n)
+    finally:
+        os.close(r)
+        os.close(w)
+    return True
+
+
+def download_source(url: str, out_path: str, max_memory: int = 0):
+    """Descarga `url` a memoria si su Content-Length no supera `max_memory`; si no, a `out_path`.
+
+    Returns:
+        Los bytes descargados, o None si se escribieron en `out_path`
+    """
+    with _get_http_session().get(url, stream=True, timeout=DOWNLOAD_TIMEOUT) as resp:
+        resp.raise_for_status()
+        length = resp.headers.get('Content-Length', '')
+        if max_memory and length.isdigit() and int(length) <= max_memory:
+            return resp.content
+        with open(out_path, 'wb') as f:
+            if WORKER_SPLICE_DOWNLOADS and _splice_response_to_file(resp, f):
+                return None
+            # Copiar desde el socket en bloques de DOWNLOAD_CHUNK_SIZE dentro de shutil (sin bucle Python por chunk);
+            # decode_content para respetar Content-Encoding (gzip) como hacía iter_content
+            resp.raw.decode_content = True
+            shutil.copyfileobj(resp.raw, f, length=DOWNLOAD_CHUNK_SIZE)
+    return None
 
 
 def download_to_path(url: str, out_path: str):
-    resp = requests.get(url, stream=True, timeout=60)
-    resp.raise_for_status()
-    with open(out_path, 'wb') as f:
-        for chunk in resp.iter_content(chunk_size=8192):
-            if chunk:
-                f.write(chunk)
+    download_source(url, out_path)
     return out_path
 
 
+def _pcm_decode_command(input_url: str, sample_rate: int) -> list:
+    """Comando FFmpeg que decodifica `input_url` a PCM float32 mono por stdout."""
+    return ['ffmpeg', '-loglevel', 'error', '-i', input_url, '-vn',
+            '-f', 'f32le', '-ac', '1', '-ar', str(sample_rate), 'pipe:1']
+
+
+def decode_audio_bytes(data: bytes, sample_rate: int = STREAM_SAMPLE_RATE):
+    """Decodifica un audio ya descargado sin escribirlo a disco.
+
+    Los bytes se ponen en un memfd que FFmpeg abre como archivo normal: a
+    diferencia de un pipe admite saltos, así que también sirve para MP4 con el
+    índice al final. Lanza RuntimeError si FFmpeg falla.
+    """
+    import numpy as np
+
+    fd = os.memfd_create('job_source')
+    try:
+        with open(fd, 'wb', closefd=False) as f:
+            f.write(data)
+        result = subprocess.run(
+            _pcm_decode_command(f'/dev/fd/{fd}', sample_rate),
+            pass_fds=(fd,),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+    finally:
+        os.close(fd)
+
+    if result.returncode != 0 or not result.stdout:
+        error_msg = result.stderr.decode('utf-8', errors='ignore').strip()
+        raise RuntimeError(f"FFmpeg no pudo decodificar el audio en memoria: {error_msg}")
+    return np.frombuffer(result.stdout, dtype=np.float32)
+
+
+# Contenedores que FFmpeg no siempre puede leer desde un pipe: MP4/MOV suelen
+# llevar el índice (moov) al final y necesitan acceso aleatorio
+_SEEKABLE_EXTENSIONS = ('.mp4', '.m4a', '.m4v', '.mov', '.3gp')
+_SEEKABLE_CONTENT_TYPES = ('video/mp4', 'audio/mp4', 'audio/x-m4a', 'video/quicktime', 'video/3gpp', 'audio/3gpp')
+
+
+def _needs_seekable_input(url: str, content_type: str = None) -> bool:
+    """True si la fuente es MP4/MOV (por extensión o Content-Type) y no conviene decodificarla en streaming."""
+    path = url.split('?', 1)[0].lower()
+    if path.endswith(_SEEKABLE_EXTENSIONS):
+        return True
+    mime = (content_type or '').split(';', 1)[0].strip().lower()
+    return mime in _SEEKABLE_CONTENT_TYPES
+
+
+def stream_decode_audio(url: str, sample_rate: int = STREAM_SAMPLE_RATE):
+    """Descarga `url` y la decodifica con FFmpeg a la vez (stdin -> stdout).
+
+    Devuelve un array float32 mono a `sample_rate`, listo para `AudioTranscriber.transcribe`.
+    Los errores HTTP se propagan tal cual (requests). Lanza RuntimeError si la
+    fuente es MP4/MOV (se detecta antes de descargar el cuerpo) o si FFmpeg no
+    puede decodificarla desde un pipe.
+    """
+    import numpy as np
+
+    if _needs_seekable_input(url):
+        raise RuntimeError("contenedor MP4/MOV: requiere descarga completa")
+    resp = _get_http_session().get(url, stream=True, timeout=DOWNLOAD_TIMEOUT)
+    try:
+        resp.raise_for_status()
+        if _needs_seekable_input(url, resp.headers.get('Content-Type')):
+            raise RuntimeError(f"contenedor {resp.headers.get('Content-Type')}: requiere descarga completa")
+        proc = subprocess.Popen(
+            _pcm_decode_command('pipe:0', sample_rate),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+    except BaseException:
+        resp.close()
+        raise
+    download_error = []
+    stderr_chunks = []
+
+    def _feed():
+        # Productor: la red escribe en FFmpeg mientras el hilo principal lee el PCM
+        try:
+            with resp:
+                # Igual que download_to_path: copiar desde el socket sin pasar por iter_content
+                resp.raw.decode_content = True
+                shutil.copyfileobj(resp.raw, proc.stdin, length=DOWNLOAD_CHUNK_SIZE)
+        except BrokenPipeError:
+            pass  # FFmpeg terminó antes (error de decodificación): se informa abajo
+        except Exception as e:
+            download_error.append(e)
+        finally:
+            try:
+                proc.stdin.close()
+            except Exception:
+                pass
+
+    feeder = threading.Thread(target=_feed, daemon=True)
+    stderr_reader = threading.Thread(target=lambda: stderr_chunks.append(proc.stderr.read()), daemon=True)
+    feeder.start()
+    stderr_reader.start()
+    pcm = proc.stdout.read()
+    proc.wait()
+    feeder.join()
+    stderr_reader.join()
+
+    if download_error:
+        raise download_error[0]
+    if proc.returncode != 0 or not pcm:
+        error_msg = b''.join(stderr_chunks).decode('utf-8', errors='ignore').strip()
+        raise RuntimeError(f"FFmpeg no pudo decodificar el stream: {error_msg}")
+    return np.frombuffer(pcm, dtype=np.float32)
+
+
+def _dumps_json(obj, indent: int = None) -> bytes:
+    """JSON en UTF-8 (sin escapar no-ASCII), con orjson si está instalado.
+
+    orjson solo admite sangría de 2 espacios: cualquier `indent` la activa.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, ensure_ascii=False, indent=indent).encode('utf-8')
+
+
+def _loads_json(data: bytes):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def atomic_write_json(path: str, obj, indent: int = None):
+    """Escribe JSON de forma atómica (ver `atomic_write_bytes`)."""
+    atomic_write_bytes(path, _dumps_json(obj, indent))
+
+
+def _get_transcriber(whisper_model: str = None):
+    """Devuelve el transcriptor del modelo pedido, cargándolo solo la primera vez.
+
+    Antes se reutilizaba el modelo del primer job aunque otro job pidiera uno
+    distinto. Se mantienen hasta WORKER_MODEL_CACHE_SIZE modelos (LRU) para
+    acotar la memoria.
+    """
+    key = whisper_model or 'default'
+    with _singleton_lock:
+        transcriber = _transcriber_cache.get(key)
+        if transcriber is not None:
+            _transcriber_cache.move_to_end(key)
+            return transcriber
+        load_lock = _transcriber_load_locks.setdefault(key, threading.Lock())
+
+    with load_lock:
+        # Otro hilo pudo cargarlo mientras se esperaba el lock de este modelo
+        with _singleton_lock:
+            transcriber = _transcriber_cache.get(key)
+            if transcriber is not None:
+                _transcriber_cache.move_to_end(key)
+                return transcriber
+
+        options = {'backend': WHISPER_BACKEND, 'precision': WHISPER_PRECISION}
+        transcriber = AudioTranscriber(model_name=whisper_model, **options) if whisper_model else AudioTranscriber(**options)
+
+        with _singleton_lock:
+            _transcriber_cache[key] = transcriber
+            evicted = []
+            while len(_transcriber_cache) > WORKER_MODEL_CACHE_SIZE:
+                evicted.append(_transcriber_cache.popitem(last=False))
+
+        # Fuera del lock: sacar el modelo también de la caché de transcriber.py,
+        # que si no lo mantendría en memoria aunque el worker ya no lo use
+        for evicted_key, evicted_transcriber in evicted:
+            evicted_transcriber.release()
+            logger.info(f"Modelo Whisper '{evicted_key}' descartado de la caché del worker")
+        return transcriber
+
+
+def _get_diarizer():
+    """Devuelve el diarizador del proceso, creándolo solo la primera vez."""
+    global _diarizer_singleton
+    # Comprobación sin lock: una vez creado, los jobs no se serializan aquí
+    if _diarizer_singleton is None:
+        with _diarizer_lock:
+            if _diarizer_singleton is None:
+                _diarizer_singleton = SpeakerDiarizer()
+    return _diarizer_singleton
+
+
+def _preload_models():
+    """Carga por adelantado los modelos indicados por WORKER_PRELOAD_*."""
+    try:
+        if WORKER_PRELOAD_WHISPER:
+            _get_transcriber()
+        if WORKER_PRELOAD_DIARIZER:
+            _get_diarizer()
+    except Exception:
+        logger.exception("No se pudieron precargar los modelos del worker")
+
+
+# Sufijo de un job tomado: <job>.json.<host>-<pid>.processing. El host y el pid
+# identifican al worker dueño para poder recuperar sus jobs si muere
+CLAIM_SUFFIX = '.processing'
+_CLAIM_HOST = socket.gethostname().split('.')[0]
+
+
+def _claim_job(job_path: str):
+    """
+    Toma un job renombrándolo atómicamente a su nombre de claim.
+
+    Returns:
+        Ruta del job tomado, o None si otro worker lo tomó antes
+    """
+    claimed = f"{job_path}.{_CLAIM_HOST}-{os.getpid()}{CLAIM_SUFFIX}"
+    try:
+        os.rename(job_path, claimed)
+    except FileNotFoundError:
+        return None
+    try:
+        # rename conserva el mtime del job: fijarlo a la hora del claim (ver
+        # WORKER_FOREIGN_CLAIM_TIMEOUT)
+        os.utime(claimed)
+    except OSError:
+        pass
+    return claimed
+
+
+def _unclaimed_path(claimed_path: str) -> str:
+    """Ruta original (<job>.json) de un job tomado."""
+    return claimed_path[:claimed_path.rindex('.json.') + len('.json')]
+
+
+def _recover_stale_claims():
+    """
+    Devuelve a la cola los jobs tomados por un worker de este host que ya no
+    existe (o por este mismo pid en una ejecución anterior, p. ej. el pid 1 de
+    un contenedor reiniciado). Se llama al arrancar, sin jobs en curso.
+
+    Los claims de otros hosts solo se recuperan si superan
+    WORKER_FOREIGN_CLAIM_TIMEOUT; si no, se avisa de cuáles quedan tomados.
+    """
+    with os.scandir(JOBS_DIR) as it:
+        claimed = [entry.path for entry in it if entry.name.endswith(CLAIM_SUFFIX)]
+
+    foreign = []
+    now = time.time()
+    for path in claimed:
+        tag = path[len(_unclaimed_path(path)) + 1:-len(CLAIM_SUFFIX)]
+        host, _, pid = tag.rpartition('-')
+        if tag and host != _CLAIM_HOST:
+            # Claim de otro host: su pid no es comprobable aquí, solo su antigüedad
+            try:
+                age = now - os.stat(path).st_mtime
+            except FileNotFoundError:
+                continue
+            if not (WORKER_FOREIGN_CLAIM_TIMEOUT and age > WORKER_FOREIGN_CLAIM_TIMEOUT):
+                foreign.append(os.path.basename(path))
+                continue
+            logger.warning(f"[JOBFILE] Claim de {host} sin cambios desde hace {age:.0f}s: se devuelve a la cola")
+        elif tag and pid.isdigit() and int(pid) != os.getpid():
+            try:
+                os.kill(int(pid), 0)
+                continue  # El worker dueño sigue vivo
+            except ProcessLookupError:
+                pass
+            except PermissionError:
+                continue  # Existe, aunque sea de otro usuario
+        # tag vacío: claim antiguo (<job>.json.processing) sin dueño identificable
+        try:
+            os.rename(path, _unclaimed_path(path))
+            logger.info(f"[JOBFILE] Recuperado job abandonado: {path}")
+        except OSError as e:
+            logger.warning(f"[JOBFILE] No se pudo recuperar {path}: {e}")
+
+    if foreign:
+        logger.warning(
+            f"[JOBFILE] {len(foreign)} jobs tomados por otros hosts; si ese host ya no existe "
+            f"(p. ej. un contenedor recreado), renombrarlos a <job>.json o fijar "
+            f"WORKER_FOREIGN_CLAIM_TIMEOUT: {foreign}"
+        )
+
+
 def _load_job(path: str):
     try:
-        with open(path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(path, 'rb') as f:
+            return _loads_json(f.read())
     except Exception as e:
         logger.error(f"No se pudo leer job file {path}: {e}")
         return None
@@ -99,10 +549,9 @@ def _move_to_failed(job: dict, src_path: str, error: str = None):
     try:
         job['last_error'] = error
         job['attempts'] = job.get('attempts', 0)
-        failed_name = os.path.basename(src_path) + '.failed'
+        failed_name = os.path.basename(_unclaimed_path(src_path)) + '.failed'
         failed_path = os.path.join(FAILED_DIR, failed_name)
-        with open(failed_path, 'w', encoding='utf-8') as ff:
-            json.dump(job, ff, ensure_ascii=False, indent=2)
+        atomic_write_json(failed_path, job, indent=2)
         try:
             os.remove(src_path)
         except Exception:
@@ -112,30 +561,58 @@ def _move_to_failed(job: dict, src_path: str, error: str = None):
         logger.error(f"[JOB {job.get('job_id')}] Error moviendo a failed: {mv_e}")
 
 
-def process_job_file(path: str):
-    """Procesa un job JSON. La función asume que el archivo ya fue renombrado a .processing"""
-    job = _load_job(path)
-    if not job:
-        return False
+def _move_unreadable_to_failed(src_path: str):
+    """Aparta a failed, tal cual, un job file que no se puede leer para no dejar el claim colgado."""
+    os.makedirs(FAILED_DIR, exist_ok=True)
+    failed_path = os.path.join(FAILED_DIR, os.path.basename(_unclaimed_path(src_path)) + '.failed')
+    try:
+        os.replace(src_path, failed_path)
+        logger.info(f"Job file ilegible movido a failed: {failed_path}")
+    except FileNotFoundError:
+        pass
+    except Exception as mv_e:
+        logger.error(f"Error moviendo a failed el job file {src_path}: {mv_e}")
 
-    job_id = job.get('job_id')
-    source_url = job.get('source_url')
-    task = job.get('task', 'transcribe-diarize')
-    whisper_model = job.get('whisper_model')
-    num_speakers = job.get('num_speakers')
-    attempts = int(job.get('attempts', 0))
 
-    if not source_url:
-        logger.error(f"[JOB {job_id}] no tiene source_url")
-        _move_to_failed(job, path, error='missing_source_url')
-        return False
+def _job_local_path(job: dict) -> str:
+    """Ruta en UPLOAD_DIR donde se descarga la fuente del job."""
+    filename = os.path.basename(job['source_url'].split('?')[0])
+    return os.path.join(UPLOAD_DIR, f"{job.get('job_id')}_{filename}")
+
 
-    filename = os.path.basename(source_url.split('?')[0])
-    local_path = os.path.join(UPLOAD_DIR, f"{job_id}_{filename}")
+def _fetch_job_source(job: dict, path: str):
+    """Descarga la fuente del job (a memoria con streaming o a disco).
+
+    Returns:
+        (ok, audio): `audio` es el array decodificado en streaming o None si se
+        descargó a disco. Si falla, ok es False y el job ya quedó reencolado
+        para reintento o movido a failed.
+    """
+    job_id = job.get('job_id')
+    source_url = job['source_url']
+    local_path = _job_local_path(job)
+    # Audio ya decodificado en memoria (array 16 kHz mono para Whisper y pyannote)
+    audio = None
 
     try:
-        logger.info(f"[JOB {job_id}] Descargando {source_url} -> {local_path}")
-        download_to_path(source_url, local_path)
+        if WORKER_STREAM_DECODE:
+            try:
+                logger.info(f"[JOB {job_id}] Descargando y decodificando en streaming {source_url}")
+                audio = stream_decode_audio(source_url)
+            except RuntimeError as e:
+                logger.warning(f"[JOB {job_id}] Streaming no disponible, descargando a disco: {e}")
+        if audio is None:
+            logger.info(f"[JOB {job_id}] Descargando {source_url} -> {local_path}")
+            # Una fuente pequeña se decodifica en memoria y no toca el disco
+            max_memory = WORKER_MEMORY_DOWNLOAD_MAX if hasattr(os, 'memfd_create') else 0
+            data = download_source(source_url, local_path, max_memory=max_memory)
+            if data is not None:
+                try:
+                    audio = decode_audio_bytes(data)
+                except (RuntimeError, OSError) as e:
+                    logger.warning(f"[JOB {job_id}] No se pudo decodificar en memoria, se guarda a disco: {e}")
+                    with open(local_path, 'wb') as f:
+                        f.write(data)
     except Exception as e:
         status = None
         if hasattr(e, 'response') and getattr(e, 'response') is not None:
@@ -145,41 +622,161 @@ def process_job_file(path: str):
                 status = None
 
         logger.error(f"[JOB {job_id}] Error descargando source_url: {e} (status={status})")
-        attempts = attempts + 1
+        attempts = int(job.get('attempts', 0)) + 1
         job['attempts'] = attempts
 
         if attempts >= MAX_ATTEMPTS or status == 404:
             _move_to_failed(job, path, error=str(e))
-            return False
+            return False, None
 
         # actualizar contador y renombrar de vuelta para reintento
         try:
-            with open(path, 'w', encoding='utf-8') as wf:
-                json.dump(job, wf, ensure_ascii=False)
+            atomic_write_json(path, job)
+            os.rename(path, _unclaimed_path(path))
         except Exception as wfe:
             logger.error(f"[JOB {job_id}] No se pudo actualizar intentos en job file: {wfe}")
 
+        return False, None
+
+    return True, audio
+
+
+def _prefetch_job(path: str):
+    """Descarga la fuente de un job tomado, en un hilo de E/S y antes de que
+    haya un worker libre para procesarlo.
+
+    Returns:
+        None si el job no es válido (process_job_file lo gestiona), False si la
+        descarga falló (ya gestionado) o una tupla (audio,) para process_job_file
+    """
+    job = _load_job(path)
+    if not job or not job.get('source_url'):
+        return None
+    ok, audio = _fetch_job_source(job, path)
+    if not ok:
         return False
+    return (audio,)
+
+
+def _report_progress(job_id, progress, message):
+    """Actualiza el progreso del job si main.py inyectó la función."""
+    if _update_job_func:
+        try:
+            _update_job_func(job_id, progress=progress, message=message)
+        except Exception as e:
+            logger.debug(f"[JOB {job_id}] Error actualizando progreso: {e}")
+
+
+def _transcription_result(job: dict, res: dict) -> dict:
+    """Resultado final de un job de solo transcripción."""
+    return {
+        'job_id': job.get('job_id'),
+        'state': 'done',
+        'progress': 100,
+        'message': 'completado',
+        'task': job.get('task', 'transcribe-diarize'),
+        'whisper_model': job.get('whisper_model'),
+        'text': res.get('text', ''),
+        'segments': res.get('segments', []),
+        'timestamp': datetime.utcnow().isoformat()
+    }
+
+
+def _save_job_result(job: dict, path: str, local_path: str, job_result: dict):
+    """Procesado exitoso: elimina job file y archivo local y guarda los resultados."""
+    job_id = job.get('job_id')
+    _report_progress(job_id, 98, "Finalizando...")
+    
+    # unlink directo (un syscall) en vez de comprobar antes con os.path.exists
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"[JOB {job_id}] No se pudo eliminar job file: {e}")
+
+    try:
+        os.remove(local_path)
+    except Exception:
+        pass
+
+    # Guardar resultados en disco para que la UI/usuarios puedan descargarlos
+    try:
+        # Escritura atómica: la UI puede estar leyendo los resultados mientras
+        # se escriben y no debe ver nunca un JSON o un .txt a medias
+        json_path = os.path.join(RESULTS_DIR, f"{job_id}.json")
+        try:
+            atomic_write_json(json_path, job_result, indent=2)
+        except FileNotFoundError:
+            # RESULTS_DIR se crea al arrancar; recrearlo solo si se borró en caliente
+            os.makedirs(RESULTS_DIR, exist_ok=True)
+            atomic_write_json(json_path, job_result, indent=2)
+
+        # Guardar sólo el texto en un archivo .txt para descarga rápida
+        txt_path = os.path.join(RESULTS_DIR, f"{job_id}.txt")
+        try:
+            text_out = job_result.get('text') or ''
+            atomic_write_bytes(txt_path, text_out.encode('utf-8'))
+        except Exception:
+            pass
+
+        logger.info(f"[JOB {job_id}] Resultados guardados en: {json_path}")
+        
+        # Actualizar estado final
+        _report_progress(job_id, 100, "Completado")
+        
+    except Exception as e:
+        logger.warning(f"[JOB {job_id}] No se pudieron guardar resultados: {e}")
 
-    # Obtener singletons de modelos con bloqueo
-    global _transcriber_singleton, _diarizer_singleton
-    with _singleton_lock:
-        if _transcriber_singleton is None:
-            _transcriber_singleton = AudioTranscriber(model_name=whisper_model) if whisper_model else AudioTranscriber()
-        if _diarizer_singleton is None:
-            # crear diarizer solo si será necesario
-            if task != 'transcribe':
-                _diarizer_singleton = SpeakerDiarizer()
 
-    transcriber = _transcriber_singleton
+def process_job_file(path: str, prefetched: tuple = None):
+    """Procesa un job JSON. La función asume que el archivo ya fue tomado con _claim_job
+
+    Args:
+        path: Ruta del job tomado
+        prefetched: Resultado de _prefetch_job, (audio,), si la fuente ya se descargó
+    """
+    job = _load_job(path)
+    if not job:
+        _move_unreadable_to_failed(path)
+        return False
+
+    job_id = job.get('job_id')
+    source_url = job.get('source_url')
+    task = job.get('task', 'transcribe-diarize')
+    whisper_model = job.get('whisper_model')
+    num_speakers = job.get('num_speakers')
+
+    if not source_url:
+        logger.error(f"[JOB {job_id}] no tiene source_url")
+        _move_to_failed(job, path, error='missing_source_url')
+        return False
+
+    local_path = _job_local_path(job)
+    if prefetched is not None:
+        audio, = prefetched
+    else:
+        ok, audio = _fetch_job_source(job, path)
+        if not ok:
+            return False
+
+    # Obtener modelos cacheados
+    transcriber = _get_transcriber(whisper_model)
+    if task != 'transcribe':
+        # crear diarizer solo si será necesario
+        _get_diarizer()
+
+    # Helper para actualizar progreso si está disponible, descartando los pasos
+    # pequeños muy seguidos (el 100 final lo envía siempre _save_job_result)
+    last_sent = [None, 0.0]
 
-    # Helper para actualizar progreso si está disponible
     def _update_progress(progress, message):
-        if _update_job_func:
-            try:
-                _update_job_func(job_id, progress=progress, message=message)
-            except Exception as e:
-                logger.debug(f"[JOB {job_id}] Error actualizando progreso: {e}")
+        now = time.monotonic()
+        if (last_sent[0] is not None and progress - last_sent[0] < PROGRESS_MIN_STEP
+                and now - last_sent[1] < PROGRESS_MIN_INTERVAL):
+            return
+        last_sent[0], last_sent[1] = progress, now
+        _report_progress(job_id, progress, message)
 
     try:
         # Actualizar estado inicial
@@ -189,31 +786,35 @@ def process_job_file(path: str):
             logger.info(f"[JOB {job_id}] Ejecutando transcripción")
             _update_progress(10, "Cargando modelo Whisper...")
             
-            res = transcriber.transcribe(local_path)
+            res = transcriber.transcribe(audio if audio is not None else local_path)
             _update_progress(90, "Transcripción completada")
             logger.info(f"[JOB {job_id}] Transcripción completada: {len(res.get('text',''))} chars")
         else:
             logger.info(f"[JOB {job_id}] Ejecutando transcripción + diarización")
             
+            # Decodificar una sola vez: Whisper y pyannote usan el mismo array 16 kHz mono
+            if audio is None:
+                audio = transcriber.load_audio(local_path)
+
             # Paso 1: Transcribir (10% -> 50%)
             _update_progress(10, "Cargando modelo Whisper...")
-            trans_result = transcriber.transcribe_with_timestamps(local_path)
+            trans_segments = transcriber.transcribe_with_timestamps(audio)
             _update_progress(50, "Transcripción completada")
-            logger.info(f"[JOB {job_id}] Transcripción completada: {len(trans_result.get('segments', []))} segmentos")
+            logger.info(f"[JOB {job_id}] Transcripción completada: {len(trans_segments)} segmentos")
             
             # Paso 2: Diarizar (50% -> 85%)
             try:
                 _update_progress(55, "Cargando modelo de diarización...")
-                diarizer = _diarizer_singleton or SpeakerDiarizer()
+                diarizer = _get_diarizer()
                 _update_progress(60, "Identificando hablantes...")
                 
-                dia = diarizer.diarize(local_path, num_speakers=num_speakers)
+                dia = diarizer.diarize(audio, num_speakers=num_speakers)
                 _update_progress(85, "Diarización completada")
                 logger.info(f"[JOB {job_id}] Diarización completada: {len(dia)} segmentos")
                 
                 # Paso 3: Combinar resultados (85% -> 95%)
                 _update_progress(88, "Combinando resultados...")
-                aligned_segments = align_transcription_with_diarization(trans_result, dia)
+                aligned_segments = align_transcription_with_diarization(trans_segments, dia)
                 
                 # Renumerar hablantes (empezar desde 1)
                 aligned_segments = renumber_speakers(aligned_segments)
@@ -234,87 +835,311 @@ def process_job_file(path: str):
         # mover a failed si falla la transcripción gravemente
         _move_to_failed(job, path, error=str(e))
         try:
-            if os.path.exists(local_path):
-                os.remove(local_path)
+            os.remove(local_path)
         except Exception:
             pass
         return False
 
-    # Procesado exitoso: eliminar job file y archivo local
-    _update_progress(98, "Finalizando...")
-    
-    try:
-        if os.path.exists(path):
-            os.remove(path)
-    except Exception as e:
-        logger.warning(f"[JOB {job_id}] No se pudo eliminar job file: {e}")
+    # Preparar resultado final
+    if task == 'transcribe':
+        job_result = _transcription_result(job, res)
+    else:
+        # Formatear texto con hablantes
+        formatted_text = format_transcript(aligned_segments, format_type='text') if aligned_segments else ''
+        
+        job_result = {
+            'job_id': job_id,
+            'state': 'done',
+            'progress': 100,
+            'message': 'completado',
+            'task': task,
+            'whisper_model': whisper_model,
+            'text': formatted_text,
+            'segments': aligned_segments if aligned_segments else [],
+            'statistics': statistics if statistics else {},
+            'num_speakers': len(statistics) if statistics else 0,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+
+    _save_job_result(job, path, local_path, job_result)
+
+    return True
+
+
+# Aviso para que el loop vuelva a escanear sin esperar a POLL_INTERVAL (p. ej. al
+# quedar un worker libre). Con inotify se usa además un pipe para poder esperar
+# ambos a la vez con select()
+_wake_event = threading.Event()
+_wake_pipe = None
+
 
+def _wake_worker():
+    """Despierta al loop principal para que escanee JOBS_DIR ya."""
+    _wake_event.set()
+    if _wake_pipe is not None:
+        try:
+            os.write(_wake_pipe[1], b'\0')
+        except BlockingIOError:
+            pass  # Ya hay un aviso pendiente
+
+
+def notify_new_job():
+    """Avisa de que hay un job nuevo en JOBS_DIR.
+
+    Lo llama main.py tras encolar un job: el worker embebido lo toma al momento
+    aunque no haya inotify. Desde otro proceso no tiene efecto (ese worker se
+    entera por inotify o por el escaneo periódico).
+    """
+    _wake_worker()
+
+
+def _make_job_watcher():
+    """Observador inotify de JOBS_DIR (Linux con `inotify_simple`), o None para usar sleep."""
     try:
-        if os.path.exists(local_path):
-            os.remove(local_path)
-    except Exception:
-        pass
+        from inotify_simple import INotify, flags
+    except ImportError:
+        return None
+    try:
+        watcher = INotify()
+        # CLOSE_WRITE: main.py termina de escribir el job; MOVED_TO: escrituras atómicas (os.replace)
+        watcher.add_watch(JOBS_DIR, flags.CLOSE_WRITE | flags.MOVED_TO)
+        global _wake_pipe
+        if _wake_pipe is None:
+            _wake_pipe = os.pipe()
+            for fd in _wake_pipe:
+                os.set_blocking(fd, False)
+        logger.info("Esperando jobs con inotify")
+        return watcher
+    except OSError as e:
+        logger.warning(f"No se pudo usar inotify en {JOBS_DIR}, se usa polling: {e}")
+        return None
 
-    # Guardar resultados en disco para que la UI/usuarios puedan descargarlos
+
+def _wait_for_jobs(watcher):
+    """Bloquea hasta que llegue un job nuevo, se llame a _wake_worker o pase POLL_INTERVAL."""
+    if watcher is None:
+        _wake_event.wait(POLL_INTERVAL)
+        _wake_event.clear()
+        return
     try:
-        results_dir = os.path.join(UPLOAD_DIR, 'results')
-        os.makedirs(results_dir, exist_ok=True)
+        ready, _, _ = select.select([watcher, _wake_pipe[0]], [], [], POLL_INTERVAL)
+        if watcher in ready:
+            watcher.read(timeout=0)  # Descartar los eventos: el loop vuelve a escanear
+        if _wake_pipe[0] in ready:
+            os.read(_wake_pipe[0], 4096)
+    except OSError as e:
+        logger.warning(f"Error leyendo eventos inotify: {e}")
+        time.sleep(POLL_INTERVAL)
+    _wake_event.clear()
 
-        # Preparar resultado final
-        if task == 'transcribe':
-            job_result = {
-                'job_id': job_id,
-                'state': 'done',
-                'progress': 100,
-                'message': 'completado',
-                'task': task,
-                'whisper_model': whisper_model,
-                'text': res.get('text', '') if 'res' in locals() else '',
-                'segments': res.get('segments', []) if 'res' in locals() else [],
-                'timestamp': datetime.utcnow().isoformat()
-            }
-        else:
-            # Formatear texto con hablantes
-            formatted_text = format_transcript(aligned_segments, output_format='text') if aligned_segments else ''
-            
-            job_result = {
-                'job_id': job_id,
-                'state': 'done',
-                'progress': 100,
-                'message': 'completado',
-                'task': task,
-                'whisper_model': whisper_model,
-                'text': formatted_text,
-                'segments': aligned_segments if aligned_segments else [],
-                'statistics': statistics if statistics else {},
-                'num_speakers': len(statistics) if statistics else 0,
-                'timestamp': datetime.utcnow().isoformat()
-            }
-
-        json_path = os.path.join(results_dir, f"{job_id}.json")
-        with open(json_path, 'w', encoding='utf-8') as jf:
-            json.dump(job_result, jf, ensure_ascii=False, indent=2)
 
-        # Guardar sólo el texto en un archivo .txt para descarga rápida
-        txt_path = os.path.join(results_dir, f"{job_id}.txt")
+def _make_executor():
+    """Pool para ejecutar jobs en paralelo.
+
+    Como proceso independiente y con WORKER_MAX_WORKERS > 1 se usan procesos: cada
+    uno carga sus modelos una vez (singletons por proceso) y transcripción, diarización
+    y FFmpeg no compiten por el GIL. Embebido en main.py se usan hilos, porque la
+    función de progreso inyectada actualiza el estado en memoria de ese proceso.
+    """
+    if WORKER_MAX_WORKERS > 1 and _update_job_func is None:
+        logger.info(f"Procesando hasta {WORKER_MAX_WORKERS} jobs en paralelo (procesos)")
+        # Cada proceso tiene sus propios modelos: precargarlos al arrancarlo.
+        # spawn en vez de fork: este proceso ya tiene hilos (descargas, inotify)
+        # y quizá CUDA inicializado, y un fork heredaría locks y contexto a medias
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=WORKER_MAX_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_preload_models
+        )
+    # Con hilos los modelos se comparten: se precargan una vez en este proceso
+    _preload_models()
+    return concurrent.futures.ThreadPoolExecutor(max_workers=WORKER_MAX_WORKERS)
+
+
+class _ScalingExecutor:
+    """Limita cuántos jobs procesa a la vez el pool, con un límite que se ajusta
+    a la cola (ver WORKER_SCALE_IDLE_SECONDS).
+
+    El pool se crea con WORKER_MAX_WORKERS y este envoltorio retiene los `submit`
+    que superan el límite actual. Los hilos del pool se crean bajo demanda, así que
+    con poca cola no llegan a existir; un pool de procesos arranca todos sus
+    procesos igualmente, pero los que sobran quedan ociosos en vez de competir por CPU.
+
+    main_loop solo toma límite + WORKER_PREFETCH_JOBS jobs, así que en `submit`
+    esperan como mucho los jobs de prefetch, y `scale` sube el límite en el mismo
+    escaneo en que aparece la cola, no un worker por escaneo.
+    """
+
+    def __init__(self, executor, max_workers: int):
+        self._executor = executor
+        self._max_workers = max_workers
+        self._limit = 1
+        self._running = 0
+        self._idle_since = time.monotonic()
+        self._cond = threading.Condition()
+
+    def scale(self, backlog: int, in_flight: int) -> int:
+        """Ajusta el límite según los jobs pendientes y en curso y devuelve el nuevo límite."""
+        now = time.monotonic()
+        with self._cond:
+            if backlog or in_flight:
+                self._idle_since = now
+            target = min(self._max_workers, backlog + in_flight)
+            if target > self._limit:
+                self._limit = target
+                logger.info(f"Escalando a {self._limit} workers ({backlog} jobs pendientes, {in_flight} en curso)")
+                self._cond.notify_all()
+            elif self._limit > 1 and now - self._idle_since > WORKER_SCALE_IDLE_SECONDS:
+                self._limit = 1
+                logger.info("Sin jobs pendientes: volviendo a 1 worker")
+            return self._limit
+
+    def submit(self, fn, *args):
+        with self._cond:
+            while self._running >= self._limit:
+                self._cond.wait()
+            self._running += 1
         try:
-            text_out = job_result.get('text') or ''
-            with open(txt_path, 'w', encoding='utf-8') as tf:
-                tf.write(text_out)
+            future = self._executor.submit(fn, *args)
         except Exception:
-            pass
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
 
-        logger.info(f"[JOB {job_id}] Resultados guardados en: {json_path}")
-        
-        # Actualizar estado final
-        _update_progress(100, "Completado")
-        
+    def _release(self):
+        with self._cond:
+            self._running -= 1
+            self._cond.notify()
+
+
+def process_job_batch(paths: list, prefetched: list):
+    """Procesa juntos varios jobs de solo transcripción que usan el mismo modelo.
+
+    Con transcribe_many los clips cortos comparten una pasada del modelo. Si el
+    lote falla, cada job se procesa por separado con process_job_file.
+
+    Args:
+        paths: Rutas de los jobs tomados
+        prefetched: Resultado de _prefetch_job, (audio,), de cada job
+    """
+    # Un job ilegible no debe arrastrar al resto del lote: se procesa aparte
+    # (process_job_file lo aparta a failed) y el lote sigue con los demás
+    ok = True
+    batch = []
+    for path, pf in zip(paths, prefetched):
+        job = _load_job(path)
+        if job:
+            batch.append((path, pf, job))
+        else:
+            ok = process_job_file(path, pf) and ok
+    if not batch:
+        return ok
+    paths, prefetched, jobs = (list(column) for column in zip(*batch))
+    local_paths = [_job_local_path(job) for job in jobs]
+    inputs = [
+        audio if audio is not None else local_path
+        for (audio,), local_path in zip(prefetched, local_paths)
+    ]
+
+    logger.info(f"Transcribiendo lote de {len(jobs)} jobs: {[job.get('job_id') for job in jobs]}")
+    for job in jobs:
+        _report_progress(job.get('job_id'), 10, "Transcribiendo en lote...")
+    try:
+        transcriber = _get_transcriber(jobs[0].get('whisper_model'))
+        results = transcriber.transcribe_many(inputs)
     except Exception as e:
-        logger.warning(f"[JOB {job_id}] No se pudieron guardar resultados: {e}")
+        logger.exception(f"Error transcribiendo el lote, se procesa job a job: {e}")
+        return all([process_job_file(path, pf) for path, pf in zip(paths, prefetched)]) and ok
+
+    for job, path, local_path, res in zip(jobs, paths, local_paths, results):
+        _save_job_result(job, path, local_path, _transcription_result(job, res))
+    return ok
+
+
+# Clave de lote de los jobs que no se agrupan
+_NO_BATCH = object()
+
+
+def _batch_key(job_path: str):
+    """Modelo Whisper si el job es de solo transcripción (agrupable), o _NO_BATCH.
+
+    Se lee antes de tomar el job, así que puede desaparecer entretanto (otro
+    worker lo tomó): en ese caso no se agrupa y el claim posterior lo descarta.
+    """
+    try:
+        with open(job_path, 'rb') as f:
+            job = _loads_json(f.read())
+    except (OSError, ValueError):
+        return _NO_BATCH
+    if job.get('task') != 'transcribe':
+        return _NO_BATCH
+    return job.get('whisper_model')
+
+
+def _cached_batch_key(entry, cache: dict):
+    """_batch_key de una entrada de JOBS_DIR, leyendo cada job file una sola vez.
+
+    La clave de caché es (nombre, inodo): un job reescrito (reintento) es otro
+    inodo y se vuelve a leer. Los errores de lectura no se cachean.
+    """
+    cache_key = (entry.name, entry.inode())
+    if cache_key in cache:
+        return cache[cache_key]
+    batch_key = _batch_key(entry.path)
+    if batch_key is not _NO_BATCH or os.path.exists(entry.path):
+        cache[cache_key] = batch_key
+    return batch_key
 
+
+def _batching_enabled() -> bool:
+    """Los lotes solo aceleran openai-whisper (transcribe_many codifica varios clips
+    en una pasada); con los demás backends serían solo lecturas extra por escaneo."""
+    if WORKER_BATCH_SIZE <= 1:
+        return False
+    try:
+        backend = resolve_backend(WHISPER_BACKEND)
+    except ValueError:
+        return False
+    if backend != 'whisper':
+        logger.info(f"WORKER_BATCH_SIZE={WORKER_BATCH_SIZE} ignorado: el backend {backend} transcribe job a job")
+        return False
     return True
 
 
+def _run_prefetched_batch(executor, paths: list):
+    """Descarga los jobs de un lote y los procesa juntos en `executor`."""
+    ready = []
+    for path in paths:
+        try:
+            prefetched = _prefetch_job(path)
+        except Exception as e:
+            # No dejar sin procesar al resto del lote
+            logger.exception(f"[JOBFILE] Error preparando {path}: {e}")
+            continue
+        if prefetched is None:
+            # Job inválido: process_job_file lo mueve a failed
+            executor.submit(process_job_file, path).result()
+        elif prefetched is not False:
+            ready.append((path, prefetched))
+
+    if not ready:
+        return False
+    if len(ready) == 1:
+        return executor.submit(process_job_file, *ready[0]).result()
+    return executor.submit(
+        process_job_batch, [path for path, _ in ready], [pf for _, pf in ready]
+    ).result()
+
+
+def _run_prefetched_job(executor, path: str):
+    """Descarga el job en el hilo de E/S actual y después lo procesa en `executor`."""
+    prefetched = _prefetch_job(path)
+    if prefetched is False:
+        return False
+    return executor.submit(process_job_file, path, prefetched).result()
+
+
 def main_loop():
     logger.info("Worker arrancando, escaneando jobs en: %s" % JOBS_DIR)
     # Asegurar directorios antes de arrancar el loop principal (por si no se ejecutf3 startup de FastAPI)
@@ -324,47 +1149,110 @@ def main_loop():
         else:
             os.makedirs(JOBS_DIR, exist_ok=True)
             os.makedirs(FAILED_DIR, exist_ok=True)
-            os.makedirs(os.path.join(UPLOAD_DIR, 'results'), exist_ok=True)
+            os.makedirs(RESULTS_DIR, exist_ok=True)
     except Exception:
         logger.exception("No se pudieron asegurar los directorios de uploads en worker")
 
-    executor = concurrent.futures.ThreadPoolExecutor(max_workers=WORKER_MAX_WORKERS)
+    try:
+        _recover_stale_claims()
+    except Exception:
+        logger.exception("No se pudieron recuperar jobs abandonados")
+
+    executor = _make_executor()
+    scaling = WORKER_MAX_WORKERS > 1 and WORKER_SCALE_IDLE_SECONDS > 0
+    if scaling:
+        executor = _ScalingExecutor(executor, WORKER_MAX_WORKERS)
+    # Las descargas se solapan con el procesamiento: hasta WORKER_PREFETCH_JOBS
+    # jobs se descargan mientras los workers transcriben otros
+    max_in_flight = WORKER_MAX_WORKERS + WORKER_PREFETCH_JOBS
+    batching = _batching_enabled()
+    io_executor = (
+        concurrent.futures.ThreadPoolExecutor(max_workers=max_in_flight)
+        if WORKER_PREFETCH_JOBS > 0 or batching else None
+    )
     futures = set()
+    # Claves de lote ya leídas, por (nombre, inodo) de cada job pendiente
+    batch_keys = {}
+    watcher = _make_job_watcher()
+
+    def _track(fut):
+        # Al terminar queda un hueco libre: tomar el siguiente job sin esperar
+        fut.add_done_callback(lambda _: _wake_worker())
+        futures.add(fut)
 
     while True:
         try:
-            os.makedirs(JOBS_DIR, exist_ok=True)
-            os.makedirs(FAILED_DIR, exist_ok=True)
+            # Los directorios se crean antes del loop; si se borra JOBS_DIR en
+            # caliente lo recrea el except FileNotFoundError de abajo
 
             # Limpiar futures completados
             done = {f for f in futures if f.done()}
             futures -= done
 
-            # Recolectar archivos .json disponibles
-            for fname in os.listdir(JOBS_DIR):
-                if not fname.endswith('.json'):
-                    continue
+            if len(futures) >= max_in_flight:
+                # Sin huecos libres no se tomaría ningún job: no recorrer el
+                # directorio (puede tener miles de entradas). Al terminar un
+                # future, su callback despierta el loop.
+                _wait_for_jobs(watcher)
+                continue
 
-                # Limit concurrency
-                if len(futures) >= WORKER_MAX_WORKERS:
-                    break
+            # Recolectar archivos .json disponibles (scandir: sin stat extra por entrada,
+            # el tipo viene en la propia entrada del directorio). Se copia a una lista
+            # porque el bucle renombra archivos del directorio mientras recorre
+            with os.scandir(JOBS_DIR) as it:
+                job_entries = [
+                    entry for entry in it
+                    if entry.name.endswith('.json') and entry.is_file(follow_symlinks=False)
+                ]
 
-                full = os.path.join(JOBS_DIR, fname)
-                processing_path = full + '.processing'
+            # Jobs admitidos según los workers activos (escalado con la cola)
+            active_workers = executor.scale(len(job_entries), len(futures)) if scaling else WORKER_MAX_WORKERS
+            in_flight_limit = active_workers + WORKER_PREFETCH_JOBS
+
+            if batch_keys:
+                # Olvidar los jobs que ya no están pendientes (tomados o borrados)
+                pending = {(entry.name, entry.inode()) for entry in job_entries}
+                batch_keys = {k: v for k, v in batch_keys.items() if k in pending}
+
+            # Lotes en formación por modelo (WORKER_BATCH_SIZE > 1)
+            batches = {}
+            for entry in job_entries:
+                full = entry.path
+                batch_key = _cached_batch_key(entry, batch_keys) if batching else _NO_BATCH
+
+                # Limit concurrency (cada lote en formación ocupará un hueco;
+                # un job que entra en un lote ya abierto no ocupa otro)
+                if batch_key not in batches and len(futures) + len(batches) >= in_flight_limit:
+                    if batches:
+                        continue  # Puede haber más jobs para los lotes abiertos
+                    break
 
                 try:
-                    # Intentar renombrar atómicamente para marcar como tomado
-                    os.replace(full, processing_path)
-                except FileNotFoundError:
-                    # Otro proceso ya lo tomó
-                    continue
+                    # Renombrar atómicamente para marcar como tomado
+                    processing_path = _claim_job(full)
                 except Exception as e:
                     logger.error(f"[JOBFILE] No se pudo mover {full} a processing: {e}")
                     continue
+                if processing_path is None:
+                    # Otro proceso ya lo tomó
+                    continue
+
+                if batch_key is not _NO_BATCH:
+                    batch = batches.setdefault(batch_key, [])
+                    batch.append(processing_path)
+                    if len(batch) >= WORKER_BATCH_SIZE:
+                        _track(io_executor.submit(_run_prefetched_batch, executor, batches.pop(batch_key)))
+                    continue
 
                 # Enviar a executor
-                fut = executor.submit(process_job_file, processing_path)
-                futures.add(fut)
+                if io_executor is not None:
+                    _track(io_executor.submit(_run_prefetched_job, executor, processing_path))
+                else:
+                    _track(executor.submit(process_job_file, processing_path))
+
+            # Lotes incompletos: se envían ya en vez de esperar a más jobs
+            for batch in batches.values():
+                _track(io_executor.submit(_run_prefetched_batch, executor, batch))
 
         except FileNotFoundError:
             logger.info("JOBS_DIR no encontrado, creando...")
@@ -372,7 +1260,7 @@ def main_loop():
         except Exception as e:
             logger.exception(f"Error en el loop del worker: {e}")
 
-        time.sleep(POLL_INTERVAL)
+        _wait_for_jobs(watcher)
 
 
 if __name__ == '__main__':
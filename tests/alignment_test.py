@@ -0,0 +1,86 @@
+import os
+import random
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from src import utils
+
+
+def _baseline_align(transcription_segments, diarization_segments):
+    """Alineación original (recorrido completo por segmento), como referencia."""
+    diarization_segments = utils.renumber_speakers(diarization_segments)
+    aligned = []
+    for seg in transcription_segments:
+        max_overlap = 0
+        speaker = "UNKNOWN"
+        for dia in diarization_segments:
+            overlap = max(0, min(seg["end"], dia["end"]) - max(seg["start"], dia["start"]))
+            if overlap > max_overlap:
+                max_overlap = overlap
+                speaker = dia["speaker"]
+        aligned.append({
+            "start": seg["start"],
+            "end": seg["end"],
+            "text": seg["text"],
+            "speaker": speaker,
+            "duration": seg["end"] - seg["start"]
+        })
+    return aligned
+
+
+def _random_case(rng):
+    # Tiempos en una rejilla gruesa a veces, para forzar empates y bordes exactos
+    def t(x):
+        return round(x * 4) / 4 if rng.random() < 0.5 else x
+
+    total = rng.uniform(5, 120)
+    dia = []
+    for _ in range(rng.randint(0, 40)):
+        start = t(rng.uniform(0, total))
+        dia.append({"start": start, "end": t(start + rng.uniform(0, 15)), "speaker": f"S{rng.randint(0, 4)}"})
+    rng.shuffle(dia)  # pyannote no garantiza orden y los segmentos se solapan
+    trans = []
+    for i in range(rng.randint(0, 60)):
+        start = t(rng.uniform(-1, total))
+        trans.append({"start": start, "end": t(start + rng.uniform(0, 10)), "text": f"seg {i}"})
+    return trans, dia
+
+
+@pytest.fixture(params=['python', 'numba'])
+def kernel(request, monkeypatch):
+    if request.param == 'python':
+        monkeypatch.setattr(utils, '_SPEAKER_KERNEL', False)
+    else:
+        pytest.importorskip('numba')
+        monkeypatch.setattr(utils, '_SPEAKER_KERNEL', None)
+        assert utils._get_speaker_kernel()
+    return request.param
+
+
+def test_alignment_matches_baseline(kernel):
+    rng = random.Random(1234)
+    for _ in range(300):
+        trans, dia = _random_case(rng)
+        assert utils.align_transcription_with_diarization(trans, dia) == _baseline_align(trans, dia)
+
+
+def test_tie_goes_to_first_segment(kernel):
+    trans = [{"start": 1.0, "end": 3.0, "text": "hola"}]
+    # Mismo solape (1 s) con ambos; gana el primero de la lista original aunque empiece después
+    dia = [
+        {"start": 2.0, "end": 5.0, "speaker": "B"},
+        {"start": 0.0, "end": 2.0, "speaker": "A"},
+    ]
+    assert utils.align_transcription_with_diarization(trans, dia)[0]["speaker"] == "SPEAKER_01"
+
+
+def test_unmatched_segment_is_unknown(kernel):
+    trans = [{"start": 10.0, "end": 11.0, "text": "x", "word_count": 1}]
+    dia = [{"start": 0.0, "end": 10.0, "speaker": "A"}]
+    aligned = utils.align_transcription_with_diarization(trans, dia)
+    assert aligned[0]["speaker"] == "UNKNOWN"
+    assert aligned[0]["word_count"] == 1
@@ -0,0 +1,74 @@
+import os
+import stat
+import sys
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from src.utils import atomic_write_bytes
+
+
+def test_replaces_file_without_leftovers(tmp_path):
+    path = tmp_path / 'job.json'
+    path.write_bytes(b'viejo')
+    atomic_write_bytes(str(path), b'nuevo')
+
+    assert path.read_bytes() == b'nuevo'
+    assert os.listdir(tmp_path) == ['job.json']
+    umask = os.umask(0)
+    os.umask(umask)
+    assert stat.S_IMODE(path.stat().st_mode) == 0o666 & ~umask
+
+
+def test_concurrent_writers_never_leave_partial_file(tmp_path):
+    path = str(tmp_path / 'result.json')
+    payloads = [bytes([i]) * (256 * 1024) for i in range(8)]
+    errors = []
+
+    def write(data):
+        try:
+            for _ in range(5):
+                atomic_write_bytes(path, data)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(p,)) for p in payloads]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    with open(path, 'rb') as f:
+        assert f.read() in payloads
+    assert os.listdir(tmp_path) == ['result.json']
+
+
+def test_failed_write_keeps_old_content(tmp_path, monkeypatch):
+    path = tmp_path / 'job.json'
+    path.write_bytes(b'viejo')
+
+    def broken_replace(src, dst):
+        raise OSError('disco lleno')
+
+    monkeypatch.setattr(os, 'replace', broken_replace)
+    with pytest.raises(OSError):
+        atomic_write_bytes(str(path), b'nuevo')
+    assert path.read_bytes() == b'viejo'
+    assert os.listdir(tmp_path) == ['job.json']
+
+
+def test_temp_file_is_not_picked_up_as_job(tmp_path, monkeypatch):
+    seen = []
+    real_replace = os.replace
+
+    def spy(src, dst):
+        seen.append(os.path.basename(src))
+        real_replace(src, dst)
+
+    monkeypatch.setattr(os, 'replace', spy)
+    atomic_write_bytes(str(tmp_path / 'abc.json'), b'{}')
+    assert not seen[0].endswith('.json')
@@ -0,0 +1,82 @@
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from src.diarizer import SpeakerDiarizer
+
+link = SpeakerDiarizer._link_speakers
+
+
+def _voices(n, dim=192, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((n, dim)), rng
+
+
+def _windows(voices, rng, layout, noise=0.1):
+    """Ventanas con etiquetas locales propias; layout = hablantes reales de cada ventana."""
+    windows = []
+    for speakers in layout:
+        labels = [f"L{w}" for w in range(len(speakers))]
+        embs = [voices[s] + noise * rng.standard_normal(voices.shape[1]) for s in speakers]
+        windows.append((labels, np.array(embs)))
+    return windows
+
+
+def _global(mappings, layout):
+    """Hablante global asignado a cada (ventana, hablante real)."""
+    return {(w, s): mappings[w][f"L{i}"] for w, speakers in enumerate(layout) for i, s in enumerate(speakers)}
+
+
+def test_same_speaker_linked_across_windows():
+    voices, rng = _voices(3)
+    layout = [[0, 1], [2, 0], [1], [1, 2, 0]]
+    assigned = _global(link(_windows(voices, rng, layout)), layout)
+
+    for s in range(3):
+        assert len({g for (w, real), g in assigned.items() if real == s}) == 1
+    assert len(set(assigned.values())) == 3
+    # Numeración por orden de aparición
+    assert assigned[(0, 0)] == "SPEAKER_00" and assigned[(0, 1)] == "SPEAKER_01"
+
+
+def test_max_speakers_merges_closest():
+    voices, rng = _voices(3)
+    # El hablante 2 es casi el 0: con max_speakers=2 deben unirse esos dos
+    voices[2] = voices[0] + 0.8 * rng.standard_normal(voices.shape[1])
+    layout = [[0, 1], [2, 1]]
+    free = _global(link(_windows(voices, rng, layout), threshold=0.1), layout)
+    assert len(set(free.values())) == 3
+
+    assigned = _global(link(_windows(voices, rng, layout), max_speakers=2, threshold=0.1), layout)
+    assert len(set(assigned.values())) == 2
+    assert assigned[(0, 0)] == assigned[(1, 2)]
+
+
+def test_min_speakers_keeps_speakers_apart():
+    voices, rng = _voices(1)
+    layout = [[0], [0], [0]]
+    assert len(set(_global(link(_windows(voices, rng, layout)), layout).values())) == 1
+
+    assigned = _global(link(_windows(voices, rng, layout), min_speakers=2), layout)
+    assert len(set(assigned.values())) == 2
+
+
+def test_speakers_of_one_window_never_merged():
+    voices, rng = _voices(1)
+    # Dos hablantes locales idénticos en la misma ventana siguen separados
+    layout = [[0, 0]]
+    assigned = link(_windows(voices, rng, layout, noise=0.0), max_speakers=1)
+    assert assigned == [{"L0": "SPEAKER_00", "L1": "SPEAKER_01"}]
+
+
+def test_invalid_embedding_gets_own_speaker():
+    voices, rng = _voices(1)
+    windows = _windows(voices, rng, [[0], [0]])
+    windows.append((["L0", "L1"], np.array([voices[0], np.zeros(voices.shape[1])])))
+    mappings = link(windows)
+    assert mappings[0]["L0"] == mappings[1]["L0"] == mappings[2]["L0"] == "SPEAKER_00"
+    assert mappings[2]["L1"] == "SPEAKER_01"
@@ -0,0 +1,151 @@
+import functools
+import http.server
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import pytest
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('UPLOAD_DIR', tempfile.mkdtemp())
+
+import src.worker as worker
+
+BODY = os.urandom(3 * 1024 * 1024 + 123)
+# Audio real para los tests de decodificación en streaming (lo rellena `mp3`)
+MEDIA = {}
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path in ('/audio.mp3', '/clip.m4a', '/media'):
+            data = MEDIA.get('mp3', b'')
+            self.send_response(200)
+            self.send_header('Content-Type', 'video/mp4' if self.path == '/media' else 'audio/mpeg')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+
+        if self.path == '/chunked':
+            self.send_response(200)
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for i in range(0, len(BODY), 65536):
+                chunk = BODY[i:i + 65536]
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+            self.wfile.write(b'0\r\n\r\n')
+            return
+
+        self.send_response(200)
+        length = len(BODY) + (10 if self.path == '/truncated' else 0)
+        self.send_header('Content-Length', str(length))
+        self.end_headers()
+        if self.path == '/trickle':
+            # Parte del cuerpo llega junto con las cabeceras y el resto con pausas
+            self.wfile.flush()
+            self.wfile.write(BODY[:1000])
+            self.wfile.flush()
+            time.sleep(0.2)
+            for i in range(1000, len(BODY), 256 * 1024):
+                self.wfile.write(BODY[i:i + 256 * 1024])
+                self.wfile.flush()
+                time.sleep(0.01)
+        else:
+            self.wfile.write(BODY)
+        if self.path == '/truncated':
+            self.close_connection = True
+
+
+@pytest.fixture(scope='module')
+def server():
+    srv = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{srv.server_port}'
+    srv.shutdown()
+
+
+@pytest.fixture
+def splice_calls(monkeypatch):
+    calls = []
+    original = worker._splice_response_to_file
+
+    def spy(resp, f):
+        calls.append(original(resp, f))
+        return calls[-1]
+
+    monkeypatch.setattr(worker, 'WORKER_SPLICE_DOWNLOADS', True)
+    monkeypatch.setattr(worker, '_splice_response_to_file', spy)
+    return calls
+
+
+@pytest.mark.parametrize('path', ['/full', '/trickle'])
+def test_splice_download_is_byte_identical(server, splice_calls, tmp_path, path):
+    if not hasattr(os, 'splice'):
+        pytest.skip('os.splice no disponible')
+    # Dos veces para reutilizar la conexión del pool tras un splice
+    for i in range(2):
+        out = tmp_path / f'out{i}'
+        worker.download_to_path(server + path, str(out))
+        assert out.read_bytes() == BODY
+    assert splice_calls == [True, True]
+
+
+def test_chunked_download_falls_back_to_copy(server, splice_calls, tmp_path):
+    out = tmp_path / 'out'
+    worker.download_to_path(server + '/chunked', str(out))
+    assert out.read_bytes() == BODY
+    assert splice_calls == [False]
+
+
+def test_splice_download_detects_truncated_body(server, splice_calls, tmp_path):
+    if not hasattr(os, 'splice'):
+        pytest.skip('os.splice no disponible')
+    with pytest.raises(requests.exceptions.ConnectionError):
+        worker.download_to_path(server + '/truncated', str(tmp_path / 'out'))
+
+
+def test_download_without_splice_flag(server, monkeypatch, tmp_path):
+    monkeypatch.setattr(worker, 'WORKER_SPLICE_DOWNLOADS', False)
+    out = tmp_path / 'out'
+    worker.download_to_path(server + '/full', str(out))
+    assert out.read_bytes() == BODY
+
+
+@pytest.fixture(scope='module')
+def mp3():
+    if shutil.which('ffmpeg') is None:
+        pytest.skip('ffmpeg no disponible')
+    MEDIA['mp3'] = subprocess.run(
+        ['ffmpeg', '-v', 'error', '-f', 'lavfi', '-i', 'sine=frequency=440:duration=1',
+         '-f', 'mp3', 'pipe:1'],
+        stdout=subprocess.PIPE, check=True
+    ).stdout
+    return MEDIA['mp3']
+
+
+def test_stream_decode_audio(server, mp3):
+    audio = worker.stream_decode_audio(server + '/audio.mp3')
+    assert abs(len(audio) - worker.STREAM_SAMPLE_RATE) < worker.STREAM_SAMPLE_RATE // 10
+
+
+@pytest.mark.parametrize('path', ['/clip.m4a', '/media'])
+def test_stream_decode_skips_mp4_containers(server, mp3, monkeypatch, path):
+    # MP4/MOV (por extensión o Content-Type) no llegan a arrancar FFmpeg sobre un pipe
+    def no_popen(*args, **kwargs):
+        raise AssertionError('no debería lanzar FFmpeg')
+
+    monkeypatch.setattr(worker.subprocess, 'Popen', no_popen)
+    with pytest.raises(RuntimeError):
+        worker.stream_decode_audio(server + path)
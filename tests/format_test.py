@@ -0,0 +1,67 @@
+import os
+import random
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from src import utils
+
+
+def _baseline_srt_timestamp(seconds):
+    """Formato SRT original, que truncaba los milisegundos."""
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    secs = int(seconds % 60)
+    millis = int((seconds % 1) * 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+
+def _baseline_timestamp(seconds):
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    secs = int(seconds % 60)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}"
+
+
+def _srt_ms(ts):
+    hms, millis = ts.split(',')
+    h, m, s = map(int, hms.split(':'))
+    return ((h * 60 + m) * 60 + s) * 1000 + int(millis)
+
+
+def test_srt_milliseconds_are_rounded():
+    assert utils.format_srt_timestamp(1.025) == "00:00:01,025"
+    assert utils.format_srt_timestamp(0.9996) == "00:00:01,000"
+    assert utils.format_srt_timestamp(3599.9999) == "01:00:00,000"
+    assert utils.format_srt_timestamp(3725.5) == "01:02:05,500"
+    assert utils.format_srt_timestamp(0) == "00:00:00,000"
+
+
+def test_srt_timestamp_matches_baseline_up_to_rounding():
+    rng = random.Random(7)
+    for _ in range(5000):
+        seconds = rng.uniform(0, 20000)
+        ts = utils.format_srt_timestamp(seconds)
+        assert _srt_ms(ts) == round(seconds * 1000)
+        # Solo cambia el redondeo: como mucho 1 ms respecto a truncar
+        assert 0 <= _srt_ms(ts) - _srt_ms(_baseline_srt_timestamp(seconds)) <= 1
+
+
+def test_timestamp_matches_baseline():
+    rng = random.Random(8)
+    for _ in range(5000):
+        seconds = rng.uniform(0, 200000)
+        assert utils.format_timestamp(seconds) == _baseline_timestamp(seconds)
+
+
+def test_srt_layout():
+    segments = [
+        {"start": 0.5, "end": 2.0, "speaker": "SPEAKER_01", "text": " Hola "},
+        {"start": 2.0, "end": 3.25, "speaker": "SPEAKER_02", "text": "Adiós"},
+    ]
+    assert utils.format_as_srt(segments) == (
+        "1\n00:00:00,500 --> 00:00:02,000\n[SPEAKER_01]: Hola\n"
+        "\n"
+        "2\n00:00:02,000 --> 00:00:03,250\n[SPEAKER_02]: Adiós\n"
+    )
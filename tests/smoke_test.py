@@ -16,5 +16,13 @@ def test_health():
     print('JSON:', resp.json())
     assert resp.status_code == 200
 
+def test_single_worker_module():
+    import importlib.util
+    spec = importlib.util.find_spec('src.worker')
+    assert spec is not None
+    assert os.path.samefile(spec.origin, os.path.join(ROOT, 'src', 'worker.py'))
+    assert not os.path.exists(os.path.join(ROOT, 'src', '_downloaded_worker.py'))
+
 if __name__ == '__main__':
     test_health()
+    test_single_worker_module()
@@ -0,0 +1,57 @@
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+import src.transcriber as transcriber
+
+
+def test_same_model_loaded_once():
+    transcriber.AudioTranscriber.clear_cache()
+    loads = []
+
+    def loader():
+        loads.append(1)
+        time.sleep(0.1)
+        return object()
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(transcriber._get_or_load_model(('m',), loader)))
+        for _ in range(4)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(loads) == 1
+    assert len(set(map(id, results))) == 1
+    transcriber.AudioTranscriber.clear_cache()
+
+
+def test_slow_load_does_not_block_other_models_or_clear_cache():
+    transcriber.AudioTranscriber.clear_cache()
+    started, release = threading.Event(), threading.Event()
+
+    def slow_loader():
+        started.set()
+        release.wait(5)
+        return 'lento'
+
+    t = threading.Thread(target=transcriber._get_or_load_model, args=(('lento',), slow_loader))
+    t.start()
+    try:
+        assert started.wait(5)
+        # Mientras 'lento' carga, otra clave y clear_cache no esperan
+        t0 = time.monotonic()
+        assert transcriber._get_or_load_model(('rapido',), lambda: 'rapido') == 'rapido'
+        transcriber.AudioTranscriber.clear_cache()
+        assert time.monotonic() - t0 < 1
+    finally:
+        release.set()
+        t.join()
+    transcriber.AudioTranscriber.clear_cache()
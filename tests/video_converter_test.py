@@ -0,0 +1,280 @@
+import concurrent.futures
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from src import video_converter
+from src.video_converter import VideoConverter
+
+INFO = {'duration': 12.5, 'size': 1000, 'format': 'mov,mp4', 'has_audio': True, 'audio_codec': 'aac', 'sample_rate': 44100}
+
+
+@pytest.fixture
+def converter(tmp_path):
+    return VideoConverter(output_dir=str(tmp_path / 'out'))
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / 'video.mp4'
+    path.write_bytes(b'\0' * 100)
+    return path
+
+
+def _fake_probe(monkeypatch, converter, results):
+    calls = []
+
+    def probe(video_path, fast):
+        calls.append(fast)
+        return dict(results[fast])
+
+    monkeypatch.setattr(converter, '_probe', probe)
+    return calls
+
+
+def test_video_info_cached_until_file_changes(converter, video, monkeypatch):
+    calls = _fake_probe(monkeypatch, converter, {True: INFO})
+
+    info = converter.get_video_info(str(video))
+    assert info == INFO
+    info['duration'] = 0  # Devuelve copias: no altera la caché
+    assert converter.get_video_info(str(video)) == INFO
+    assert calls == [True]
+
+    video.write_bytes(b'\0' * 200)
+    converter.get_video_info(str(video))
+    assert calls == [True, True]
+
+
+def test_full_probe_when_headers_lack_duration(converter, video, monkeypatch):
+    calls = _fake_probe(monkeypatch, converter, {True: {**INFO, 'duration': 0.0}, False: INFO})
+    assert converter.get_video_info(str(video)) == INFO
+    assert calls == [True, False]
+    assert converter.get_video_info(str(video)) == INFO
+    assert calls == [True, False]
+
+
+def test_failed_probe_not_cached(converter, video, monkeypatch):
+    calls = _fake_probe(monkeypatch, converter, {True: {}, False: {}})
+    assert converter.get_video_info(str(video)) == {}
+    assert converter.get_video_info(str(video)) == {}
+    assert calls == [True, False, True, False]
+
+
+def test_video_info_cache_is_bounded(converter, tmp_path, monkeypatch):
+    monkeypatch.setattr(video_converter, 'INFO_CACHE_SIZE', 2)
+    calls = _fake_probe(monkeypatch, converter, {True: INFO})
+    paths = []
+    for name in ('a.mp4', 'b.mp4', 'c.mp4'):
+        path = tmp_path / name
+        path.write_bytes(b'\0')
+        paths.append(str(path))
+
+    converter.get_video_info(paths[0])
+    converter.get_video_info(paths[1])
+    converter.get_video_info(paths[0])  # a pasa a ser el más reciente
+    converter.get_video_info(paths[2])  # expulsa b
+    assert len(converter._info_cache) == 2
+    assert len(calls) == 3
+
+    converter.get_video_info(paths[0])
+    assert len(calls) == 3
+    converter.get_video_info(paths[1])
+    assert len(calls) == 4
+
+
+def test_probe_reads_headers_only_and_parses_output(converter, monkeypatch):
+    commands = []
+    output = {
+        'format': {'duration': '62.5', 'size': '2048', 'format_name': 'matroska,webm'},
+        'streams': [{'codec_type': 'video', 'codec_name': 'vp9'},
+                    {'codec_type': 'audio', 'codec_name': 'opus', 'sample_rate': '48000'}],
+    }
+
+    def run(command, **kwargs):
+        commands.append(command)
+        return subprocess.CompletedProcess(command, 0, stdout=json.dumps(output).encode())
+
+    monkeypatch.setattr(video_converter.subprocess, 'run', run)
+    info = converter._probe('/x.webm', fast=True)
+
+    assert info == {'duration': 62.5, 'size': 2048, 'format': 'matroska,webm', 'has_audio': True,
+                    'audio_codec': 'opus', 'sample_rate': 48000}
+    assert commands[0][commands[0].index('-probesize') + 1] == '32'
+    assert '-show_entries' in commands[0] and '-show_streams' not in commands[0]
+    converter._probe('/x.webm', fast=False)
+    assert '-probesize' not in commands[1]
+
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which('ffmpeg') is None, reason='ffmpeg no disponible')
+needs_ffprobe = pytest.mark.skipif(
+    shutil.which('ffmpeg') is None or shutil.which('ffprobe') is None, reason='ffmpeg/ffprobe no disponibles'
+)
+
+
+@pytest.fixture
+def source(tmp_path):
+    """7 s de audio cuyo volumen sube cada 3 s (una entrada sin video basta: se codifica solo el audio)."""
+    path = tmp_path / 'source.wav'
+    subprocess.run(
+        ['ffmpeg', '-v', 'error', '-f', 'lavfi',
+         '-i', 'aevalsrc=0.2*(1+floor(t/3))*sin(2*PI*440*t):d=7:s=22050', '-y', str(path)],
+        check=True
+    )
+    return path
+
+
+def _assert_covers(path, seconds, chunks):
+    """Duración decodificada: todo el audio, más el relleno del codificador MP3 de cada chunk."""
+    decoded = _decoded_seconds(path)
+    assert seconds - 0.05 <= decoded <= seconds + 0.1 * chunks
+
+
+def _decode(path):
+    return subprocess.run(
+        ['ffmpeg', '-v', 'error', '-i', str(path), '-f', 's16le', '-ac', '1', '-ar', '8000', 'pipe:1'],
+        stdout=subprocess.PIPE, check=True
+    ).stdout
+
+
+def _decoded_seconds(path):
+    return len(_decode(path)) / 2 / 8000
+
+
+def _assert_chunk_order(path):
+    """El volumen de cada tramo de 3 s sube: los chunks quedaron en orden."""
+    import numpy as np
+    pcm = np.frombuffer(_decode(path), dtype=np.int16).astype(np.float64)
+    rms = [np.sqrt(np.mean(pcm[int(a * 8000):int((a + 1) * 8000)] ** 2)) for a in (1, 4, 6)]
+    assert rms[0] < rms[1] < rms[2]
+
+
+@needs_ffmpeg
+def test_parallel_chunks_written_in_order(converter, source, tmp_path):
+    out = tmp_path / 'out.mp3'
+    converter._encode_chunks_parallel(str(source), str(out), [0, 3, 6], 3, '64k', 22050, 3, 3)
+    # Los chunks concatenados cubren el audio completo, en orden, sin huecos ni solapes
+    _assert_covers(out, 7, 3)
+    _assert_chunk_order(out)
+
+
+@needs_ffmpeg
+def test_parallel_chunk_error_removes_output(converter, tmp_path):
+    out = tmp_path / 'out.mp3'
+    broken = tmp_path / 'broken.mp4'
+    broken.write_bytes(b'no es un video')
+    with pytest.raises(RuntimeError):
+        converter._encode_chunks_parallel(str(broken), str(out), [0, 3], 3, '64k', 22050, 2, 2)
+    assert not out.exists()
+
+
+@needs_ffmpeg
+def test_long_video_uses_parallel_chunks(converter, source, monkeypatch):
+    monkeypatch.setattr(converter, 'get_video_info', lambda path: {**INFO, 'duration': 7.0})
+    monkeypatch.setattr(video_converter.os, 'cpu_count', lambda: 4)
+    calls = []
+    original = converter._encode_chunks_parallel
+    monkeypatch.setattr(converter, '_encode_chunks_parallel', lambda *a: calls.append(a) or original(*a))
+
+    out = converter.convert_long_video_to_mp3(str(source), 'long.mp3', '64k', 22050, chunk_duration=3)
+    assert calls and calls[0][2] == [0, 3, 6]
+    _assert_covers(out, 7, 3)
+
+
+@needs_ffmpeg
+def test_segmented_encode_splits_in_one_pass(converter, source, tmp_path):
+    chunk_dir = tmp_path / 'chunks'
+    chunk_dir.mkdir()
+    chunks = converter._encode_segmented(str(source), str(chunk_dir), '64k', 22050, 3, 7.0)
+
+    assert [os.path.basename(c) for c in chunks] == ['chunk_000.mp3', 'chunk_001.mp3', 'chunk_002.mp3']
+    assert abs(_decoded_seconds(chunks[0]) - 3) < 0.15
+
+
+@needs_ffmpeg
+def test_long_video_single_cpu_uses_segment_muxer(converter, source, monkeypatch):
+    monkeypatch.setattr(converter, 'get_video_info', lambda path: {**INFO, 'duration': 7.0})
+    monkeypatch.setattr(video_converter.os, 'cpu_count', lambda: 1)
+    monkeypatch.setattr(converter, '_encode_chunks_parallel', lambda *a: pytest.fail('no debería codificar en paralelo'))
+
+    out = converter.convert_long_video_to_mp3(str(source), 'long.mp3', '64k', 22050, chunk_duration=3)
+    _assert_covers(out, 7, 3)
+    _assert_chunk_order(out)
+    # El directorio temporal de chunks se borra al terminar
+    assert os.listdir(converter.output_dir) == ['long.mp3']
+
+
+@pytest.mark.parametrize('error', [
+    RuntimeError('fallo de FFmpeg'),
+    subprocess.TimeoutExpired(['ffmpeg'], 1),
+])
+def test_later_chunk_error_cancels_pending_chunks(converter, tmp_path, monkeypatch, error):
+    started = []
+    chunk_running = threading.Event()
+    cancelled = threading.Event()
+    original_cancel = concurrent.futures.Future.cancel
+
+    def cancel(future):
+        cancelled.set()
+        return original_cancel(future)
+
+    def encode(video_path, start_time, *args):
+        started.append(start_time)
+        if start_time == 5:
+            # Falla mientras el chunk 10 ocupa el otro hilo
+            chunk_running.wait(5)
+            raise error
+        if start_time >= 10:
+            # Los que arrancan (el 10 y quizá el 15) ocupan los hilos hasta el cancel
+            chunk_running.set()
+            cancelled.wait(5)
+        return b'mp3'
+
+    monkeypatch.setattr(concurrent.futures.Future, 'cancel', cancel)
+    monkeypatch.setattr(video_converter, '_encode_chunk', encode)
+    out = tmp_path / 'out.mp3'
+    with pytest.raises(RuntimeError) as exc:
+        converter._encode_chunks_parallel('/x.mp4', str(out), [0, 5, 10, 15, 20, 25], 5, '64k', 22050, 2, 2)
+
+    # El error original llega intacto y los chunks en cola nunca arrancan: solo el
+    # 15 puede haberlo tomado el hilo del fallo antes del cancel
+    assert str(exc.value) == f"Error en chunk 1: {error}"
+    assert exc.value.__cause__ is error
+    assert sorted(started) in ([0, 5, 10], [0, 5, 10, 15])
+    assert not out.exists()
+
+
+@pytest.fixture
+def mp4(tmp_path):
+    """MP4 real de 3 s con video MPEG-4 y audio AAC a 48 kHz."""
+    path = tmp_path / 'clip.mp4'
+    subprocess.run(
+        ['ffmpeg', '-v', 'error',
+         '-f', 'lavfi', '-i', 'color=c=black:s=64x64:r=10:d=3',
+         '-f', 'lavfi', '-i', 'sine=frequency=440:sample_rate=48000:duration=3',
+         '-c:v', 'mpeg4', '-c:a', 'aac', '-shortest', '-y', str(path)],
+        check=True
+    )
+    return path
+
+
+@needs_ffprobe
+def test_real_header_probe_reads_duration_and_sample_rate(converter, mp4, monkeypatch):
+    probes = []
+    original = converter._probe
+    monkeypatch.setattr(converter, '_probe', lambda path, fast: probes.append(fast) or original(path, fast))
+
+    info = converter.get_video_info(str(mp4))
+    # Con -probesize 32 -analyzeduration 0 basta la cabecera: sin análisis completo
+    assert probes == [True]
+    assert abs(info['duration'] - 3) < 0.1
+    assert info['sample_rate'] == 48000
+    assert info['audio_codec'] == 'aac' and info['has_audio']
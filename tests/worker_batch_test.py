@@ -0,0 +1,130 @@
+import json
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('UPLOAD_DIR', tempfile.mkdtemp())
+
+import src.worker as worker
+
+
+class _FakeTranscriber:
+    def __init__(self, fail_batch=False):
+        self.fail_batch = fail_batch
+        self.batches = []
+        self.single = []
+
+    def transcribe_many(self, inputs):
+        if self.fail_batch:
+            raise RuntimeError('lote roto')
+        self.batches.append(list(inputs))
+        return [{'text': f'lote {i}', 'segments': []} for i in range(len(inputs))]
+
+    def transcribe(self, audio):
+        self.single.append(audio)
+        return {'text': 'individual', 'segments': []}
+
+
+@pytest.fixture
+def dirs(monkeypatch, tmp_path):
+    for name in ('JOBS_DIR', 'FAILED_DIR', 'RESULTS_DIR', 'UPLOAD_DIR'):
+        d = tmp_path / name.lower()
+        d.mkdir()
+        monkeypatch.setattr(worker, name, str(d))
+    return tmp_path
+
+
+def _claimed_job(dirs, job_id, content=None):
+    path = dirs / 'jobs_dir' / f'{job_id}.json.test-1{worker.CLAIM_SUFFIX}'
+    if content is None:
+        content = json.dumps({
+            'job_id': job_id, 'task': 'transcribe', 'whisper_model': 'base',
+            'source_url': f'http://localhost/{job_id}.mp3',
+        })
+    path.write_text(content)
+    return str(path)
+
+
+def _use_transcriber(monkeypatch, transcriber):
+    monkeypatch.setattr(worker, '_get_transcriber', lambda whisper_model=None: transcriber)
+
+
+def test_batch_isolates_unreadable_job(dirs, monkeypatch):
+    transcriber = _FakeTranscriber()
+    _use_transcriber(monkeypatch, transcriber)
+    paths = [_claimed_job(dirs, 'a'), _claimed_job(dirs, 'roto', '{no es json'), _claimed_job(dirs, 'b')]
+
+    assert worker.process_job_batch(paths, [('audio-a',), ('audio-roto',), ('audio-b',)]) is False
+
+    assert transcriber.batches == [['audio-a', 'audio-b']]
+    assert json.loads((dirs / 'results_dir' / 'a.json').read_text())['text'] == 'lote 0'
+    assert json.loads((dirs / 'results_dir' / 'b.json').read_text())['text'] == 'lote 1'
+    # El job ilegible queda en failed tal cual y no hay claims colgados
+    assert (dirs / 'failed_dir' / 'roto.json.failed').read_text() == '{no es json'
+    assert os.listdir(dirs / 'jobs_dir') == []
+
+
+def test_batch_falls_back_to_single_jobs(dirs, monkeypatch):
+    transcriber = _FakeTranscriber(fail_batch=True)
+    _use_transcriber(monkeypatch, transcriber)
+    paths = [_claimed_job(dirs, 'a'), _claimed_job(dirs, 'b')]
+
+    assert worker.process_job_batch(paths, [('audio-a',), ('audio-b',)]) is True
+
+    assert transcriber.single == ['audio-a', 'audio-b']
+    assert sorted(os.listdir(dirs / 'results_dir')) == ['a.json', 'a.txt', 'b.json', 'b.txt']
+    assert os.listdir(dirs / 'jobs_dir') == []
+
+
+def test_batch_falls_back_when_model_load_fails(dirs, monkeypatch):
+    transcriber = _FakeTranscriber()
+    calls = []
+
+    def get_transcriber(whisper_model=None):
+        calls.append(whisper_model)
+        if len(calls) == 1:
+            raise RuntimeError('sin memoria')
+        return transcriber
+
+    monkeypatch.setattr(worker, '_get_transcriber', get_transcriber)
+    paths = [_claimed_job(dirs, 'a'), _claimed_job(dirs, 'b')]
+
+    assert worker.process_job_batch(paths, [('audio-a',), ('audio-b',)]) is True
+    assert transcriber.single == ['audio-a', 'audio-b']
+    assert os.listdir(dirs / 'jobs_dir') == []
+
+
+def test_batch_key_read_once_per_job_file(dirs, monkeypatch):
+    reads = []
+    original = worker._batch_key
+    monkeypatch.setattr(worker, '_batch_key', lambda path: reads.append(path) or original(path))
+    job = dirs / 'jobs_dir' / 'a.json'
+    job.write_text(json.dumps({'task': 'transcribe', 'whisper_model': 'small'}))
+    cache = {}
+
+    for _ in range(3):
+        for entry in os.scandir(dirs / 'jobs_dir'):
+            assert worker._cached_batch_key(entry, cache) == 'small'
+    assert reads == [str(job)]
+
+    # Un job reescrito (otro inodo) se vuelve a leer
+    tmp = dirs / 'jobs_dir' / 'a.tmp'
+    tmp.write_text(json.dumps({'task': 'transcribe-diarize'}))
+    os.replace(tmp, job)
+    for entry in os.scandir(dirs / 'jobs_dir'):
+        assert worker._cached_batch_key(entry, cache) is worker._NO_BATCH
+    assert len(reads) == 2
+
+
+@pytest.mark.parametrize('backend, enabled', [('whisper', True), ('faster_whisper', False)])
+def test_batching_only_with_openai_whisper(monkeypatch, backend, enabled):
+    monkeypatch.setattr(worker, 'WORKER_BATCH_SIZE', 4)
+    monkeypatch.setattr(worker, 'resolve_backend', lambda name: backend)
+    assert worker._batching_enabled() is enabled
+
+    monkeypatch.setattr(worker, 'WORKER_BATCH_SIZE', 1)
+    assert worker._batching_enabled() is False
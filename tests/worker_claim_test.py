@@ -0,0 +1,120 @@
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('UPLOAD_DIR', tempfile.mkdtemp())
+
+import src.worker as worker
+
+
+@pytest.fixture
+def jobs_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(worker, 'JOBS_DIR', str(tmp_path))
+    return tmp_path
+
+
+def _claim_name(job, host, pid):
+    return f"{job}.{host}-{pid}{worker.CLAIM_SUFFIX}"
+
+
+def _dead_pid():
+    proc = subprocess.Popen([sys.executable, '-c', 'pass'])
+    proc.wait()
+    return proc.pid
+
+
+def test_claim_tags_host_and_pid(jobs_dir):
+    job = jobs_dir / 'a.json'
+    job.write_text('{}')
+
+    os.utime(job, (0, 0))
+    claimed = worker._claim_job(str(job))
+    # El mtime pasa a ser la hora del claim
+    assert time.time() - os.stat(claimed).st_mtime < 60
+    assert os.path.basename(claimed) == _claim_name('a.json', worker._CLAIM_HOST, os.getpid())
+    assert worker._unclaimed_path(claimed) == str(job)
+    assert not job.exists()
+    # Ya tomado: un segundo claim no lo encuentra
+    assert worker._claim_job(str(job)) is None
+
+
+def test_only_one_concurrent_claim_wins(jobs_dir):
+    job = jobs_dir / 'a.json'
+    job.write_text('{}')
+    results = []
+    barrier = threading.Barrier(8)
+
+    def claim():
+        barrier.wait()
+        results.append(worker._claim_job(str(job)))
+
+    threads = [threading.Thread(target=claim) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len([r for r in results if r]) == 1
+
+
+def test_recover_stale_claims(jobs_dir):
+    host = worker._CLAIM_HOST
+    live = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])
+    try:
+        names = {
+            'dead.json': _claim_name('dead.json', host, _dead_pid()),
+            'own.json': _claim_name('own.json', host, os.getpid()),
+            'legacy.json': 'legacy.json' + worker.CLAIM_SUFFIX,
+            'live.json': _claim_name('live.json', host, live.pid),
+            'remote.json': _claim_name('remote.json', 'otro-host', 1),
+        }
+        for name in names.values():
+            (jobs_dir / name).write_text('{}')
+
+        worker._recover_stale_claims()
+
+        # De vuelta en la cola: dueño muerto, este mismo pid (arranque anterior) y claims sin dueño
+        for job in ('dead.json', 'own.json', 'legacy.json'):
+            assert (jobs_dir / job).exists()
+            assert not (jobs_dir / names[job]).exists()
+        # Se respetan: dueño vivo y claims de otro host
+        for job in ('live.json', 'remote.json'):
+            assert (jobs_dir / names[job]).exists()
+            assert not (jobs_dir / job).exists()
+    finally:
+        live.kill()
+        live.wait()
+
+
+def test_host_with_dashes(jobs_dir, monkeypatch):
+    monkeypatch.setattr(worker, '_CLAIM_HOST', 'worker-node-3')
+    name = _claim_name('a.json', 'worker-node-3', _dead_pid())
+    (jobs_dir / name).write_text('{}')
+    worker._recover_stale_claims()
+    assert (jobs_dir / 'a.json').exists()
+
+
+def test_foreign_claims_reported_until_timeout(jobs_dir, monkeypatch, caplog):
+    # Un contenedor recreado tiene otro hostname y un pid que aquí puede existir
+    old = jobs_dir / _claim_name('old.json', 'contenedor-viejo', os.getpid())
+    recent = jobs_dir / _claim_name('recent.json', 'contenedor-viejo', 1)
+    old.write_text('{}')
+    recent.write_text('{}')
+    os.utime(old, (time.time() - 7200, time.time() - 7200))
+
+    with caplog.at_level(logging.WARNING, logger=worker.logger.name):
+        worker._recover_stale_claims()
+    assert old.exists() and recent.exists()
+    assert old.name in caplog.text and recent.name in caplog.text
+
+    monkeypatch.setattr(worker, 'WORKER_FOREIGN_CLAIM_TIMEOUT', 3600)
+    worker._recover_stale_claims()
+    assert (jobs_dir / 'old.json').exists() and not old.exists()
+    assert recent.exists()
@@ -0,0 +1,65 @@
+import concurrent.futures
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('UPLOAD_DIR', tempfile.mkdtemp())
+
+import src.worker as worker
+
+
+@pytest.fixture
+def pool():
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=8)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+def test_scales_to_backlog_in_one_step(pool):
+    scaling = worker._ScalingExecutor(pool, 8)
+    assert scaling.scale(5, 0) == 5
+    # Los jobs en curso también cuentan, con tope en max_workers
+    assert scaling.scale(2, 4) == 6
+    assert scaling.scale(50, 0) == 8
+    # No baja mientras haya trabajo
+    assert scaling.scale(1, 0) == 8
+
+
+def test_back_to_one_worker_when_idle(pool, monkeypatch):
+    monkeypatch.setattr(worker, 'WORKER_SCALE_IDLE_SECONDS', 0.05)
+    scaling = worker._ScalingExecutor(pool, 8)
+    assert scaling.scale(4, 0) == 4
+    assert scaling.scale(0, 0) == 4
+    time.sleep(0.1)
+    assert scaling.scale(0, 0) == 1
+
+
+def test_submit_waits_for_limit_and_scale_releases_it(pool):
+    scaling = worker._ScalingExecutor(pool, 8)
+    release = threading.Event()
+    first = scaling.submit(release.wait, 5)
+
+    second_started = threading.Event()
+    submitter = threading.Thread(target=lambda: scaling.submit(second_started.set))
+    submitter.start()
+    # Con límite 1, el segundo job espera en submit
+    assert not second_started.wait(0.2)
+
+    # Al subir el límite entra sin esperar a que termine el primero
+    scaling.scale(1, 1)
+    assert second_started.wait(2)
+    submitter.join(2)
+    release.set()
+    first.result(2)
+
+
+def test_slot_freed_when_job_finishes(pool):
+    scaling = worker._ScalingExecutor(pool, 8)
+    for i in range(3):
+        assert scaling.submit(lambda x: x * 2, i).result(2) == i * 2